@@ -4,8 +4,17 @@ from .models import (
     Category,
     CryptoCoin,
     CoinImportRequest,
+    CoinMetadata,
+    CoinCandle,
+    CoinRefreshRun,
+    ListingSnapshot,
     CoinVote,
+    CoinVoteStats,
+    CoinDailyVoteStats,
+    CoinSentimentBucket,
+    SentimentRollupState,
     CoinRating,
+    CoinRatingStats,
     CoinWishlist,
 )
 
@@ -90,7 +99,44 @@ class CryptoCoinAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(CoinMetadata)
+class CoinMetadataAdmin(admin.ModelAdmin):
+    list_display = ("coin", "synced_at")
+    search_fields = ("coin__name", "coin__symbol")
+    raw_id_fields = ("coin",)
+
+
+@admin.register(CoinRefreshRun)
+class CoinRefreshRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at",
+        "source",
+        "limit",
+        "status",
+        "last_page",
+        "inserted",
+        "updated",
+        "unchanged",
+        "finished_at",
+    )
+    list_filter = ("source", "status")
+    ordering = ("-started_at",)
+
+
+@admin.register(ListingSnapshot)
+class ListingSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("fetched_at", "convert", "limit")
+    list_filter = ("convert",)
+    exclude = ("data",)
+
+
 admin.site.register(CoinImportRequest)
 admin.site.register(CoinVote)
+admin.site.register(CoinVoteStats)
+admin.site.register(CoinDailyVoteStats)
+admin.site.register(CoinSentimentBucket)
+admin.site.register(CoinCandle)
+admin.site.register(SentimentRollupState)
 admin.site.register(CoinRating)
+admin.site.register(CoinRatingStats)
 admin.site.register(CoinWishlist)
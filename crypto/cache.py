@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DETAIL_INFO_TTL = getattr(settings, "CRYPTO_DETAIL_INFO_TTL", 24 * 60 * 60)
+DETAIL_MARKET_TTL = getattr(settings, "CRYPTO_DETAIL_MARKET_TTL", 60)
+DETAIL_STALE_TTL = getattr(settings, "CRYPTO_DETAIL_STALE_TTL", 10 * 60)
+# Unknown coins: remember the empty upstream answer this long
+MISS_TTL = getattr(settings, "CRYPTO_DETAIL_MISS_TTL", 60)
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 10
+
+
+def is_shared_cache() -> bool:
+    """Whether the default cache is visible to every process (not locmem/dummy)."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight: Dict[str, _Call] = {}
+_inflight_lock = threading.Lock()
+
+
+def single_flight(key: str, fn: Callable[[], Any]) -> Any:
+    """Run ``fn`` once per key per process; concurrent callers share the result."""
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+
+    if not leader:
+        call.event.wait()
+        if call.error:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fn()
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.event.set()
+    return call.result
+
+
+def _store(key: str, data: Any, ttl: int, stale_ttl: int) -> None:
+    cache.set(key, {"data": data, "fresh_until": time.time() + ttl}, ttl + stale_ttl)
+
+
+def _fetch_and_store(key: str, fetch: Callable[[], Any], ttl: int, stale_ttl: int) -> Any:
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        # Another process is already fetching; wait briefly for its result.
+        deadline = time.time() + LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(0.1)
+            entry = cache.get(key)
+            if entry and entry["fresh_until"] > time.time():
+                return entry["data"]
+    try:
+        data = fetch()
+        if data is None:
+            # Negative entry, no stale grace: it simply expires
+            _store(key, None, min(ttl, MISS_TTL), 0)
+        else:
+            _store(key, data, ttl, stale_ttl)
+        return data
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def _revalidate(key: str, fetch: Callable[[], Any], ttl: int, stale_ttl: int) -> None:
+    try:
+        single_flight(key, lambda: _fetch_and_store(key, fetch, ttl, stale_ttl))
+    except Exception:
+        logger.exception("Background refresh of %s failed", key)
+    finally:
+        close_old_connections()
+
+
+def cached_fetch(
+    key: str,
+    fetch: Callable[[], Any],
+    ttl: int,
+    stale_ttl: int = DETAIL_STALE_TTL,
+) -> Any:
+    """
+    Return ``fetch()`` through the shared cache.
+
+    Fresh entries are served as-is. Entries up to ``stale_ttl`` seconds past
+    ``ttl`` are served immediately while one background thread refreshes
+    them. Misses are collapsed so concurrent callers trigger one upstream
+    call per process, and a cache lock keeps other processes waiting on it.
+    A ``None`` result is cached for CRYPTO_DETAIL_MISS_TTL seconds.
+    """
+    entry = cache.get(key)
+    if entry:
+        if entry["fresh_until"] <= time.time() and key not in _inflight:
+            threading.Thread(
+                target=_revalidate, args=(key, fetch, ttl, stale_ttl), daemon=True
+            ).start()
+        return entry["data"]
+    return single_flight(key, lambda: _fetch_and_store(key, fetch, ttl, stale_ttl))
+
+
+def _detail_key(part: str, coin_id: str) -> str:
+    return f"crypto:detail:{part}:{coin_id}"
+
+
+def get_coin_detail(
+    coin_id: str,
+    fetch_info: Callable[[str], Optional[Dict]],
+    fetch_market: Callable[[str], Optional[Dict]],
+    info: Optional[Dict] = None,
+) -> Optional[Dict]:
+    """
+    Coin detail payload assembled from a long-lived static part (logo,
+    description, links) and a short-lived market part. Pass ``info`` when
+    the static part is already known (e.g. from ``CoinMetadata``) to skip
+    its cache and upstream lookup.
+    """
+    if info is None:
+        info = cached_fetch(
+            _detail_key("info", coin_id), lambda: fetch_info(coin_id), DETAIL_INFO_TTL
+        )
+    if not info:
+        return None
+    market = cached_fetch(
+        _detail_key("market", coin_id), lambda: fetch_market(coin_id), DETAIL_MARKET_TTL
+    )
+    if not market:
+        return None
+    return {**info, **market}
+
+
+def warm_coin_details(
+    coin_ids: List[str],
+    fetch_infos: Callable[[List[str]], Dict[str, Dict]],
+    fetch_markets: Callable[[List[str]], Dict[str, Dict]],
+) -> int:
+    """
+    Prefill the detail cache for many coins using batch fetchers; static
+    parts that are still fresh are not fetched again. Returns the number of
+    coins whose market part was stored.
+    """
+    now = time.time()
+    missing_info = [
+        coin_id for coin_id in coin_ids
+        if (cache.get(_detail_key("info", coin_id)) or {}).get("fresh_until", 0) <= now
+    ]
+    for coin_id, info in fetch_infos(missing_info).items():
+        _store(_detail_key("info", coin_id), info, DETAIL_INFO_TTL, DETAIL_STALE_TTL)
+    markets = fetch_markets(coin_ids)
+    for coin_id, market in markets.items():
+        _store(_detail_key("market", coin_id), market, DETAIL_MARKET_TTL, DETAIL_STALE_TTL)
+    return len(markets)
+
+
+COIN_LIST_VERSION_KEY = "crypto:coins:version"
+
+
+def invalidate_coin_list() -> None:
+    """Forget the memoised coin-list version so the next read derives it from the DB."""
+    cache.delete(COIN_LIST_VERSION_KEY)
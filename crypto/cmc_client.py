@@ -0,0 +1,89 @@
+"""
+CoinMarketCap HTTP client shared by every app: one session, one token
+bucket and one in-flight cap (CMC_CONCURRENCY) for all CMC calls in the
+process, with ``Retry-After`` aware retries.
+"""
+import datetime as dt
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict
+
+import requests
+from django.conf import settings
+from requests import RequestException
+
+from .concurrency import TokenBucket
+
+CMC_BASE = getattr(settings, "CMC_API_BASE", "https://pro-api.coinmarketcap.com")
+HEADERS = {"Accepts": "application/json", "X-CMC_PRO_API_KEY": settings.CMC_PRO_API_KEY}
+
+CMC_REQUESTS_PER_MINUTE = getattr(settings, "CMC_REQUESTS_PER_MINUTE", 30)
+CMC_CONCURRENCY = getattr(settings, "CMC_CONCURRENCY", 4)
+CMC_MAX_ATTEMPTS = 4
+CMC_BACKOFF_BASE = 0.5
+CMC_BACKOFF_MAX = 30.0
+
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_BUCKET = TokenBucket(CMC_REQUESTS_PER_MINUTE, capacity=CMC_CONCURRENCY)
+# The bucket paces request starts; this caps how many are in flight at once
+_IN_FLIGHT = threading.BoundedSemaphore(CMC_CONCURRENCY)
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_delay(response, attempt: int) -> float:
+    """Seconds to wait before the next attempt: ``Retry-After`` if sent, else jittered backoff."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return max((when - dt.datetime.now(dt.timezone.utc)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return min(CMC_BACKOFF_BASE * 2 ** attempt, CMC_BACKOFF_MAX) * random.uniform(0.5, 1.5)
+
+
+def cmc_get(path: str, params: Dict = None) -> Dict:
+    """GET ``path`` (e.g. "/v1/global-metrics/quotes/latest") and return its ``data``."""
+    last = None
+    for attempt in range(CMC_MAX_ATTEMPTS):
+        _BUCKET.acquire()
+        r = None
+        try:
+            with _IN_FLIGHT:
+                r = SESSION.get(f"{CMC_BASE}{path}", params=params or {}, timeout=25)
+            try:
+                payload = r.json()
+            except Exception:
+                r.raise_for_status()
+                raise
+            status = payload.get("status", {})
+            raw_code = status.get("error_code", 0)
+            try:
+                err_code = int(raw_code)
+            except (TypeError, ValueError):
+                err_code = 0
+            if err_code not in (None, 0):
+                msg = status.get("error_message") or ""
+                raise RequestException(f"CMC error {err_code}: {msg}")
+            r.raise_for_status()
+            return payload.get("data", payload)
+        except RequestException as e:
+            last = e
+            raw = None
+            try:
+                raw = r.text[:500]
+            except Exception: pass
+            logger.warning("CMC GET %s failed: %s | raw=%s", path, e, raw)
+            if r is not None and 400 <= r.status_code < 500 and r.status_code != 429:
+                break  # bad request / auth: retrying will not help
+            if attempt + 1 < CMC_MAX_ATTEMPTS:
+                time.sleep(_retry_delay(r, attempt))
+    raise last
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q
+from rest_framework.renderers import JSONRenderer
+
+from .cache import COIN_LIST_VERSION_KEY, is_shared_cache
+from .models import Category, CoinRating, CryptoCoin
+from .serializers import CategorySerializer, CryptoCoinListSerializer
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+PAGE_CACHE_TTL = getattr(settings, "CRYPTO_LIST_CACHE_TTL", 60 * 60)
+PRERENDER_PAGES = getattr(settings, "CRYPTO_LIST_PRERENDER_PAGES", 5)
+# Seconds a process may reuse the DB-derived version before reading it again
+VERSION_TTL = getattr(settings, "CRYPTO_LIST_VERSION_TTL", 5)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def coin_list_version() -> str:
+    """
+    Version of the coin list, derived from the DB so every process agrees
+    on it whatever the cache backend: the coins (count, latest
+    ``last_updated``), the ratings behind ``average_rating`` (count, latest
+    ``updated_at``) and the category list. It is memoised for
+    CRYPTO_LIST_VERSION_TTL seconds, and ``invalidate_coin_list`` drops
+    the memo after local writes.
+    """
+    version = cache.get(COIN_LIST_VERSION_KEY)
+    if version is None:
+        coins = CryptoCoin.objects.aggregate(count=Count("id"), latest=Max("last_updated"))
+        ratings = CoinRating.objects.aggregate(count=Count("id"), latest=Max("updated_at"))
+        categories = list(Category.objects.order_by("id").values_list("id", "name"))
+        raw = json.dumps([coins, ratings, categories], default=str)
+        version = hashlib.sha1(raw.encode()).hexdigest()[:12]
+        cache.set(COIN_LIST_VERSION_KEY, version, VERSION_TTL)
+    return version
+
+
+def get_coin_count(category_id, count) -> int:
+    key = f"crypto:coins:count:{coin_list_version()}:{category_id or 'all'}"
+    value = cache.get(key)
+    if value is None:
+        value = count()
+        cache.set(key, value, PAGE_CACHE_TTL)
+    return value
+
+
+def encode_cursor(coin) -> str:
+    raw = json.dumps([coin.rank, coin.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(str(e))
+    if (rank is not None and not isinstance(rank, int)) or not isinstance(pk, int):
+        raise InvalidCursor("bad cursor")
+    return rank, pk
+
+
+def _after_cursor(rank, pk) -> Q:
+    # Rows come in (rank NULLS FIRST, id) order
+    if rank is None:
+        return Q(rank__isnull=True, id__gt=pk) | Q(rank__isnull=False)
+    # rank >= r AND (rank > r OR id > pk), so the (rank, id) index gets a range seek
+    return Q(rank__gte=rank) & (Q(rank__gt=rank) | Q(id__gt=pk))
+
+
+def build_coin_list(
+    category_id=None, cursor: Optional[str] = None, page: int = 1, sparkline: Optional[str] = None
+) -> Dict[str, Any]:
+    """Payload of one coin list page; raises ``InvalidCursor``."""
+    queryset = CryptoCoin.objects.select_related("category", "rating_stats").order_by(
+        F("rank").asc(nulls_first=True), "id"
+    )
+    queryset = queryset.defer("sparkline_svg", "content_hash")
+    if not sparkline:
+        queryset = queryset.defer("sparkline_in_7d")
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    total_count = get_coin_count(category_id, queryset.count)
+
+    if cursor:
+        # Keyset pagination: same cost on every page
+        coins = list(queryset.filter(_after_cursor(*decode_cursor(cursor)))[:PAGE_SIZE])
+    else:
+        # Legacy pagination by slicing
+        start = (page - 1) * PAGE_SIZE
+        end = start + PAGE_SIZE
+        coins = list(queryset[start:end])
+
+    coins_serializer = CryptoCoinListSerializer(coins, many=True, context={"sparkline": sparkline})
+
+    categories = Category.objects.all()
+    categories_serializer = CategorySerializer(categories, many=True)
+
+    return {
+        "categories": categories_serializer.data,
+        "coins": {
+            "count": total_count,
+            "page": page,
+            "page_size": PAGE_SIZE,
+            "next_cursor": encode_cursor(coins[-1]) if len(coins) == PAGE_SIZE else None,
+            "results": coins_serializer.data,
+        },
+    }
+
+
+def page_token(
+    category_id=None, cursor: Optional[str] = None, page: int = 1, sparkline: Optional[str] = None
+) -> str:
+    position = f"c:{cursor}" if cursor else f"p:{page}"
+    raw = f"{category_id or 'all'}|{position}|{sparkline or ''}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _page_key(version: str, token: str) -> str:
+    return f"crypto:coins:page:{version}:{token}"
+
+
+def page_etag(version: str, token: str) -> str:
+    return f'"{version}-{token}"'
+
+
+def get_rendered_page(version: str, token: str) -> Optional[bytes]:
+    return cache.get(_page_key(version, token))
+
+
+def render_coin_list(
+    version: str,
+    category_id=None,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    sparkline: Optional[str] = None,
+) -> bytes:
+    """Render one page to JSON bytes and keep it for later requests of the same version."""
+    body = JSONRenderer().render(build_coin_list(category_id, cursor, page, sparkline))
+    cache.set(_page_key(version, page_token(category_id, cursor, page, sparkline)), body, PAGE_CACHE_TTL)
+    return body
+
+
+def prerender_coin_list(pages: int = PRERENDER_PAGES) -> int:
+    """
+    Render the first ``pages`` pages of the full list and of every category
+    for the current coin-list version. Each page is stored under both its
+    page number and the cursor that leads to it. Returns pages rendered.
+
+    Needs a shared cache: with a process-local one the pages would only
+    exist in the refreshing process, so nothing is rendered.
+    """
+    if not is_shared_cache():
+        logger.info("Skipping coin list pre-render: the default cache is process-local")
+        return 0
+    version = coin_list_version()
+    rendered = 0
+    for category_id in [None] + list(Category.objects.values_list("id", flat=True)):
+        cursor = None
+        for page in range(1, pages + 1):
+            data = build_coin_list(category_id, cursor, page)
+            body = JSONRenderer().render(data)
+            cache.set(_page_key(version, page_token(category_id, None, page)), body, PAGE_CACHE_TTL)
+            if cursor:
+                cache.set(_page_key(version, page_token(category_id, cursor, page)), body, PAGE_CACHE_TTL)
+            rendered += 1
+            cursor = data["coins"]["next_cursor"]
+            if not cursor:
+                break
+    logger.info("Pre-rendered %s coin list pages (version %s)", rendered, version)
+    return rendered
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+_DONE = object()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket sized in requests per minute.
+
+    ``acquire()`` blocks until a token is available; ``capacity`` is the
+    burst allowed after an idle period (defaults to one request).
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: Optional[float] = None):
+        self.rate = float(requests_per_minute) / 60.0
+        self.capacity = float(capacity or 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_pages(
+    fetch_page: Callable[[Any], Any],
+    pages: Iterable[Any],
+    max_workers: int = 4,
+    requests_per_minute: Optional[float] = None,
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Call ``fetch_page(page)`` for each page on a thread pool and yield
+    ``(page, result)`` in the order of ``pages``.
+
+    At most ``max_workers`` pages are in flight or buffered at a time, so
+    callers can start consuming the first page while later ones are still
+    downloading. Iteration stops at the first empty result; pages that are
+    still queued at that point are cancelled.
+    """
+    bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+
+    def run(page):
+        if bucket:
+            bucket.acquire()
+        return fetch_page(page)
+
+    pages = iter(pages)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        for page in pages:
+            pending.append((page, executor.submit(run, page)))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            page, future = pending.popleft()
+            result = future.result()
+            if not result:
+                return
+            next_page = next(pages, _DONE)
+            if next_page is not _DONE:
+                pending.append((next_page, executor.submit(run, next_page)))
+            yield page, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,87 @@
+import logging
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    CoinDailyVoteStats,
+    CoinRating,
+    CoinRatingStats,
+    CoinSentimentBucket,
+    CoinVote,
+    CoinVoteStats,
+    SentimentRollupState,
+)
+
+logger = logging.getLogger(__name__)
+
+_VOTE_COUNTS = {
+    "bullish": Count("id", filter=Q(vote="bullish")),
+    "bearish": Count("id", filter=Q(vote="bearish")),
+}
+
+_RATING_AGGREGATES = {
+    "count": Count("id"),
+    "total": Sum("stars"),
+    **{f"stars_{n}": Count("id", filter=Q(stars=n)) for n in range(1, 6)},
+}
+
+
+def _add_counts(target: Dict, key, row: Dict) -> None:
+    counts = target.setdefault(key, {"bullish": 0, "bearish": 0})
+    counts["bullish"] += row["bullish"]
+    counts["bearish"] += row["bearish"]
+
+
+@transaction.atomic
+def rebuild_vote_counters(batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Recompute CoinVoteStats and CoinDailyVoteStats from the raw CoinVote
+    table, plus the daily sentiment buckets of days whose raw votes were
+    compacted away.
+    """
+    totals: Dict = {}
+    daily: Dict = {}
+    for row in (
+        CoinVote.objects.order_by().values("coin_id", day=F("vote_date")).annotate(**_VOTE_COUNTS)
+    ):
+        _add_counts(totals, row["coin_id"], row)
+        _add_counts(daily, (row["coin_id"], row["day"]), row)
+
+    compacted_before = SentimentRollupState.load().compacted_before
+    if compacted_before:
+        for row in CoinSentimentBucket.objects.filter(
+            bucket="day", start__lt=compacted_before
+        ).values("coin_id", "start", "bullish", "bearish"):
+            _add_counts(totals, row["coin_id"], row)
+            _add_counts(daily, (row["coin_id"], timezone.localdate(row["start"])), row)
+
+    CoinVoteStats.objects.all().delete()
+    CoinDailyVoteStats.objects.all().delete()
+    CoinVoteStats.objects.bulk_create(
+        [CoinVoteStats(coin_id=coin_id, **counts) for coin_id, counts in totals.items()],
+        batch_size=batch_size,
+    )
+    CoinDailyVoteStats.objects.bulk_create(
+        [CoinDailyVoteStats(coin_id=coin_id, day=day, **counts) for (coin_id, day), counts in daily.items()],
+        batch_size=batch_size,
+    )
+    result = {"coins": len(totals), "coin_days": len(daily)}
+    logger.info("Rebuilt vote counters: %s", result)
+    return result
+
+
+@transaction.atomic
+def rebuild_rating_counters(batch_size: int = 1000) -> Dict[str, int]:
+    """Recompute CoinRatingStats from the raw CoinRating table."""
+    stats = [
+        CoinRatingStats(**row)
+        for row in CoinRating.objects.order_by().values("coin_id").annotate(**_RATING_AGGREGATES)
+    ]
+    CoinRatingStats.objects.all().delete()
+    CoinRatingStats.objects.bulk_create(stats, batch_size=batch_size)
+    result = {"coins": len(stats)}
+    logger.info("Rebuilt rating counters: %s", result)
+    return result
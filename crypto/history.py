@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CoinCandle, CoinPricePoint
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("1h", "1d")
+# Raw points older than this are deleted; the candles keep their rollup
+PRICE_POINT_RETENTION_DAYS = getattr(settings, "CRYPTO_PRICE_POINT_RETENTION_DAYS", 7)
+
+
+def bucket_start(ts: datetime, interval: str) -> datetime:
+    start = ts.replace(minute=0, second=0, microsecond=0)
+    if interval == "1d":
+        start = start.replace(hour=0)
+    return start
+
+
+def _update_candles(prices: Dict[int, Decimal], ts: datetime, interval: str) -> None:
+    start = bucket_start(ts, interval)
+    existing = {
+        c.coin_id: c
+        for c in CoinCandle.objects.filter(interval=interval, start=start, coin_id__in=list(prices))
+    }
+    to_create, to_update = [], []
+    for coin_id, price in prices.items():
+        candle = existing.get(coin_id)
+        if candle is None:
+            to_create.append(
+                CoinCandle(
+                    coin_id=coin_id, interval=interval, start=start,
+                    open=price, high=price, low=price, close=price,
+                )
+            )
+            continue
+        candle.high = max(candle.high, price)
+        candle.low = min(candle.low, price)
+        candle.close = price
+        to_update.append(candle)
+    CoinCandle.objects.bulk_create(to_create)
+    CoinCandle.objects.bulk_update(to_update, ["high", "low", "close"])
+
+
+def record_prices(prices: Dict[int, Decimal], ts: datetime) -> int:
+    """
+    Append one ``CoinPricePoint`` per ``{coin_id: price}`` at ``ts`` and fold
+    the prices into the 1h and 1d candles they fall in. Points must arrive
+    in time order for ``close`` to be right. Returns points written.
+    """
+    if not prices:
+        return 0
+    with transaction.atomic():
+        CoinPricePoint.objects.bulk_create(
+            [CoinPricePoint(coin_id=coin_id, ts=ts, price=price) for coin_id, price in prices.items()],
+            ignore_conflicts=True,
+        )
+        for interval in INTERVALS:
+            _update_candles(prices, ts, interval)
+    return len(prices)
+
+
+def prune_price_points(retention_days: int = PRICE_POINT_RETENTION_DAYS) -> int:
+    """Delete raw price points older than ``retention_days``. Returns points deleted."""
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = CoinPricePoint.objects.filter(ts__lt=cutoff).delete()
+    if deleted:
+        logger.info("Pruned %s price points older than %s", deleted, cutoff)
+    return deleted
+
+def get_candles(
+    coin_id: int,
+    interval: str = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict]:
+    """Stored ``{"start", "open", "high", "low", "close"}`` candles for one coin, oldest first."""
+    queryset = CoinCandle.objects.filter(coin_id=coin_id, interval=interval)
+    if start:
+        queryset = queryset.filter(start__gte=start)
+    if end:
+        queryset = queryset.filter(start__lt=end)
+    return list(queryset.order_by("start").values("start", "open", "high", "low", "close"))
@@ -0,0 +1,136 @@
+import logging
+import math
+import threading
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import single_flight
+from .cmc_client import CMC_CONCURRENCY, cmc_get
+from .concurrency import fetch_pages
+from .models import ListingSnapshot
+
+logger = logging.getLogger(__name__)
+
+# A snapshot younger than this is reused by every consumer (one refresh cycle)
+LISTINGS_MAX_AGE = getattr(settings, "CRYPTO_LISTINGS_MAX_AGE", 5 * 60)
+# Minimum depth fetched, so the coin refresh and the market boxes share one pull
+LISTINGS_LIMIT = getattr(settings, "CRYPTO_LISTINGS_LIMIT", 1000)
+LISTINGS_KEEP = getattr(settings, "CRYPTO_LISTINGS_KEEP", 24)
+PAGE_SIZE = 250
+
+_latest: Dict[str, ListingSnapshot] = {}
+_latest_lock = threading.Lock()
+
+
+def _fresh(snapshot: Optional[ListingSnapshot], limit: int, max_age: float) -> bool:
+    return (
+        snapshot is not None
+        and snapshot.limit >= limit
+        and snapshot.fetched_at >= timezone.now() - timedelta(seconds=max_age)
+    )
+
+
+def _remember(snapshot: ListingSnapshot) -> None:
+    with _latest_lock:
+        current = _latest.get(snapshot.convert)
+        if current is None or current.fetched_at <= snapshot.fetched_at:
+            _latest[snapshot.convert] = snapshot
+
+
+def _cached(limit: int, convert: str, max_age: float) -> Optional[ListingSnapshot]:
+    """A fresh snapshot from process memory, else from ListingSnapshot, else None."""
+    snapshot = _latest.get(convert)
+    if _fresh(snapshot, limit, max_age):
+        return snapshot
+    snapshot = ListingSnapshot.objects.filter(convert=convert).first()
+    if not _fresh(snapshot, limit, max_age):
+        return None
+    _remember(snapshot)
+    return snapshot
+
+
+def _fetch_pages(limit: int, convert: str, start_page: int = 1) -> Iterator[Tuple[int, List[dict]]]:
+    def fetch(page):
+        start = (page - 1) * PAGE_SIZE + 1
+        return cmc_get(
+            "/v1/cryptocurrency/listings/latest",
+            {"start": start, "limit": min(PAGE_SIZE, limit - start + 1), "convert": convert, "sort": "market_cap"},
+        )
+
+    # The client paces and caps the requests; no more workers than it lets through
+    return fetch_pages(fetch, range(start_page, math.ceil(limit / PAGE_SIZE) + 1), max_workers=CMC_CONCURRENCY)
+
+
+def _store(limit: int, convert: str, rows: List[dict]) -> ListingSnapshot:
+    snapshot = ListingSnapshot.objects.create(convert=convert, limit=limit, data=rows)
+    keep = ListingSnapshot.objects.filter(convert=convert).values_list("pk", flat=True)[:LISTINGS_KEEP]
+    ListingSnapshot.objects.filter(convert=convert).exclude(pk__in=list(keep)).delete()
+    logger.info("Fetched top %s %s listing (%s rows)", limit, convert, len(rows))
+    _remember(snapshot)
+    return snapshot
+
+
+def _refresh(limit: int, convert: str) -> ListingSnapshot:
+    rows: List[dict] = []
+    for _, data in _fetch_pages(limit, convert):
+        rows.extend(data)
+    return _store(limit, convert, rows)
+
+
+def iter_listing_pages(
+    limit: int, convert: str = "USD", start_page: int = 1, max_age: Optional[float] = None
+) -> Iterator[Tuple[int, List[dict]]]:
+    """
+    Yield ``(page, rows)`` for the top ``limit`` listing rows, PAGE_SIZE per
+    page, from ``start_page`` on.
+
+    A fresh snapshot is sliced; otherwise the pages are fetched concurrently
+    and yielded as they arrive. A complete pull from page 1 stores its first
+    CRYPTO_LISTINGS_LIMIT rows as the snapshot the other consumers read;
+    deeper pages only stream through.
+    """
+    max_age = LISTINGS_MAX_AGE if max_age is None else max_age
+    convert = convert.upper()
+    snapshot = _cached(limit, convert, max_age)
+    if snapshot is not None:
+        for page in range(start_page, math.ceil(limit / PAGE_SIZE) + 1):
+            rows = snapshot.data[(page - 1) * PAGE_SIZE:min(page * PAGE_SIZE, limit)]
+            if not rows:
+                return
+            yield page, rows
+        return
+
+    depth = min(limit, LISTINGS_LIMIT)
+    rows: Optional[List[dict]] = [] if start_page == 1 else None
+    for page, data in _fetch_pages(limit, convert, start_page):
+        if rows is not None and len(rows) < depth:
+            rows.extend(data[:depth - len(rows)])
+        yield page, data
+    if rows is not None:
+        _store(depth, convert, rows)
+
+
+def get_listing_snapshot(limit: int, convert: str = "USD", max_age: Optional[float] = None) -> ListingSnapshot:
+    """
+    A CMC /listings/latest snapshot covering at least ``limit`` coins and at
+    most ``max_age`` seconds old (CRYPTO_LISTINGS_MAX_AGE by default).
+
+    Looked up in process memory, then in ListingSnapshot; only when both
+    are stale is the listing fetched, at least CRYPTO_LISTINGS_LIMIT deep
+    and once for all concurrent callers.
+    """
+    max_age = LISTINGS_MAX_AGE if max_age is None else max_age
+    convert = convert.upper()
+    snapshot = _cached(limit, convert, max_age)
+    if snapshot is None:
+        depth = max(limit, LISTINGS_LIMIT)
+        snapshot = single_flight(f"listings:{convert}:{depth}", lambda: _refresh(depth, convert))
+    return snapshot
+
+
+def get_listings(limit: int, convert: str = "USD", max_age: Optional[float] = None) -> List[dict]:
+    """Top ``limit`` raw listing rows by market cap from the current snapshot."""
+    return get_listing_snapshot(limit, convert, max_age).data[:limit]
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from crypto.counters import rebuild_rating_counters, rebuild_vote_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild denormalized coin counters from the raw vote and rating tables"
+
+    def handle(self, *args, **opts):
+        votes = rebuild_vote_counters()
+        self.stdout.write(self.style.SUCCESS(f"Vote counters: {votes}"))
+        ratings = rebuild_rating_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rating counters: {ratings}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from crypto.sentiment import VOTE_RETENTION_DAYS, compact_votes, roll_up_sentiment
+
+
+class Command(BaseCommand):
+    help = "Roll new coin votes up into hourly/daily sentiment buckets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--compact", action="store_true", help="Delete rolled-up votes older than the retention window")
+        parser.add_argument("--retention-days", type=int, default=VOTE_RETENTION_DAYS)
+
+    def handle(self, *args, **opts):
+        result = roll_up_sentiment()
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {result['votes']} votes into {result['buckets']} buckets"))
+        if opts["compact"]:
+            deleted = compact_votes(opts["retention_days"])
+            self.stdout.write(self.style.SUCCESS(f"Compacted {deleted} votes"))
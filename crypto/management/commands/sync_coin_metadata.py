@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from crypto.models import CryptoCoin
+from crypto.providers import PROVIDERS, get_provider
+from crypto.sync import sync_coin_metadata
+
+
+class Command(BaseCommand):
+    help = "Bulk sync logo, description and links into CoinMetadata"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="Only the top N coins by rank")
+        parser.add_argument("--all", action="store_true", help="Also re-sync metadata that is not stale yet")
+        parser.add_argument(
+            "--provider", choices=sorted(PROVIDERS), help="Coin data provider (default: CRYPTO_PROVIDER)"
+        )
+
+    def handle(self, *args, **opts):
+        coins = CryptoCoin.objects.order_by("rank")
+        if not opts["all"]:
+            max_age = getattr(settings, "CRYPTO_METADATA_MAX_AGE_DAYS", 7)
+            coins = coins.filter(
+                Q(metadata__isnull=True)
+                | Q(metadata__synced_at__lt=timezone.now() - timedelta(days=max_age))
+            )
+        result = sync_coin_metadata(coins[: opts["limit"]], get_provider(opts["provider"]).fetch_coin_infos)
+        self.stdout.write(self.style.SUCCESS(f"Metadata synced: {result}"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from crypto.cache import warm_coin_details
+from crypto.models import CryptoCoin
+from crypto.providers import PROVIDERS, get_provider
+
+
+class Command(BaseCommand):
+    help = "Prefill the coin detail cache for the top-ranked coins"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Number of top coins to warm")
+        parser.add_argument(
+            "--provider", choices=sorted(PROVIDERS), help="Coin data provider (default: CRYPTO_PROVIDER)"
+        )
+
+    def handle(self, *args, **opts):
+        coin_ids = list(
+            CryptoCoin.objects.exclude(rank__isnull=True)
+            .order_by("rank")
+            .values_list("coingecko_id", flat=True)[: opts["limit"]]
+        )
+        provider = get_provider(opts["provider"])
+        warmed = warm_coin_details(coin_ids, provider.fetch_coin_infos, provider.fetch_coin_markets)
+        self.stdout.write(self.style.SUCCESS(f"Warmed {warmed}/{len(coin_ids)} coins"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0008_cryptocoin_trading_view_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cryptocoin',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the refresh-owned fields', max_length=40),
+        ),
+    ]
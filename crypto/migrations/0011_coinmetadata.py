@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0010_coinrefreshrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.URLField(blank=True, default='', max_length=500)),
+                ('description', models.TextField(blank=True, default='')),
+                ('links', models.JSONField(blank=True, default=dict)),
+                ('community_data', models.JSONField(blank=True, default=dict)),
+                ('developer_data', models.JSONField(blank=True, default=dict)),
+                ('synced_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('coin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metadata', to='crypto.cryptocoin')),
+            ],
+            options={
+                'verbose_name_plural': 'Coin metadata',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0011_coinmetadata'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cryptocoin',
+            index=models.Index(fields=['rank', 'id'], name='crypto_coin_rank_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cryptocoin',
+            index=models.Index(fields=['category', 'rank', 'id'], name='crypto_coin_cat_rank_id_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:06
+
+from django.db import migrations, models
+
+from crypto.sparklines import svg_path
+
+
+def render_sparklines(apps, schema_editor):
+    CryptoCoin = apps.get_model('crypto', 'CryptoCoin')
+    coins = list(CryptoCoin.objects.exclude(sparkline_in_7d=None).only('id', 'sparkline_in_7d'))
+    for coin in coins:
+        coin.sparkline_svg = svg_path(coin.sparkline_in_7d)
+    CryptoCoin.objects.bulk_update(coins, ['sparkline_svg'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0012_cryptocoin_crypto_coin_rank_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cryptocoin',
+            name='sparkline_svg',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Pre-rendered SVG path of sparkline_in_7d'),
+        ),
+        migrations.RunPython(render_sparklines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_vote_stats(apps, schema_editor):
+    CoinVote = apps.get_model('crypto', 'CoinVote')
+    CoinVoteStats = apps.get_model('crypto', 'CoinVoteStats')
+    CoinDailyVoteStats = apps.get_model('crypto', 'CoinDailyVoteStats')
+    counts = {
+        'bullish': Count('id', filter=Q(vote='bullish')),
+        'bearish': Count('id', filter=Q(vote='bearish')),
+    }
+    CoinVoteStats.objects.bulk_create(
+        [CoinVoteStats(**row) for row in CoinVote.objects.order_by().values('coin_id').annotate(**counts)],
+        batch_size=1000,
+    )
+    CoinDailyVoteStats.objects.bulk_create(
+        [
+            CoinDailyVoteStats(**row)
+            for row in CoinVote.objects.order_by()
+            .annotate(day=TruncDate('created_at'))
+            .values('coin_id', 'day')
+            .annotate(**counts)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0013_cryptocoin_sparkline_svg'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinVoteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bullish', models.PositiveIntegerField(default=0)),
+                ('bearish', models.PositiveIntegerField(default=0)),
+                ('coin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='vote_stats', to='crypto.cryptocoin')),
+            ],
+            options={
+                'verbose_name_plural': 'Coin vote stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CoinDailyVoteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bullish', models.PositiveIntegerField(default=0)),
+                ('bearish', models.PositiveIntegerField(default=0)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_vote_stats', to='crypto.cryptocoin')),
+            ],
+            options={
+                'verbose_name_plural': 'Coin daily vote stats',
+                'ordering': ['-day'],
+                'unique_together': {('coin', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_vote_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:09
+
+import crypto.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_vote_date(apps, schema_editor):
+    CoinVote = apps.get_model('crypto', 'CoinVote')
+    CoinVote.objects.update(vote_date=TruncDate('created_at'))
+    # Keep the first vote of each (user, coin, day); the old per-day check was racy
+    keep = (
+        CoinVote.objects.order_by()
+        .values('user_id', 'coin_id', 'vote_date')
+        .annotate(first_id=Min('id'))
+        .values_list('first_id', flat=True)
+    )
+    deleted, _ = CoinVote.objects.exclude(id__in=list(keep)).delete()
+    if not deleted:
+        return
+    CoinVoteStats = apps.get_model('crypto', 'CoinVoteStats')
+    CoinDailyVoteStats = apps.get_model('crypto', 'CoinDailyVoteStats')
+    counts = {
+        'bullish': Count('id', filter=Q(vote='bullish')),
+        'bearish': Count('id', filter=Q(vote='bearish')),
+    }
+    CoinVoteStats.objects.all().delete()
+    CoinDailyVoteStats.objects.all().delete()
+    CoinVoteStats.objects.bulk_create(
+        [CoinVoteStats(**row) for row in CoinVote.objects.order_by().values('coin_id').annotate(**counts)],
+        batch_size=1000,
+    )
+    CoinDailyVoteStats.objects.bulk_create(
+        [
+            CoinDailyVoteStats(**row)
+            for row in CoinVote.objects.order_by().values('coin_id', day=F('vote_date')).annotate(**counts)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0014_coinvotestats_coindailyvotestats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='coinvote',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='coinvote',
+            name='vote_date',
+            field=models.DateField(default=crypto.models.vote_today, editable=False),
+        ),
+        migrations.RunPython(backfill_vote_date, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='coinvote',
+            constraint=models.UniqueConstraint(fields=('user', 'coin', 'vote_date'), name='unique_daily_coin_vote'),
+        ),
+    ]
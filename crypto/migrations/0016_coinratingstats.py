@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    CoinRating = apps.get_model('crypto', 'CoinRating')
+    CoinRatingStats = apps.get_model('crypto', 'CoinRatingStats')
+    aggregates = {'count': Count('id'), 'total': Sum('stars')}
+    for n in range(1, 6):
+        aggregates[f'stars_{n}'] = Count('id', filter=Q(stars=n))
+    CoinRatingStats.objects.bulk_create(
+        [CoinRatingStats(**row) for row in CoinRating.objects.order_by().values('coin_id').annotate(**aggregates)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0015_coinvote_vote_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinRatingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('coin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_stats', to='crypto.cryptocoin')),
+            ],
+            options={
+                'verbose_name_plural': 'Coin rating stats',
+            },
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0016_coinratingstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentimentRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_vote_id', models.BigIntegerField(default=0)),
+                ('compacted_before', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoinSentimentBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('start', models.DateTimeField()),
+                ('bullish', models.PositiveIntegerField(default=0)),
+                ('bearish', models.PositiveIntegerField(default=0)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sentiment_buckets', to='crypto.cryptocoin')),
+            ],
+            options={
+                'ordering': ['coin', 'bucket', 'start'],
+                'unique_together': {('coin', 'bucket', 'start')},
+            },
+        ),
+    ]
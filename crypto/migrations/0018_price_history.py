@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0017_sentiment_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('1h', '1 hour'), ('1d', '1 day')], max_length=2)),
+                ('start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candles', to='crypto.cryptocoin')),
+            ],
+            options={
+                'ordering': ['coin', 'interval', 'start'],
+                'unique_together': {('coin', 'interval', 'start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CoinPricePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ts', models.DateTimeField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_points', to='crypto.cryptocoin')),
+            ],
+            options={
+                'unique_together': {('coin', 'ts')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0018_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fetched_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('convert', models.CharField(max_length=10)),
+                ('limit', models.PositiveIntegerField()),
+                ('data', models.JSONField()),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+            },
+        ),
+    ]
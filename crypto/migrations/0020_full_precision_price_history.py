@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0019_listingsnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coincandle',
+            name='close',
+            field=models.DecimalField(decimal_places=12, max_digits=30),
+        ),
+        migrations.AlterField(
+            model_name='coincandle',
+            name='high',
+            field=models.DecimalField(decimal_places=12, max_digits=30),
+        ),
+        migrations.AlterField(
+            model_name='coincandle',
+            name='low',
+            field=models.DecimalField(decimal_places=12, max_digits=30),
+        ),
+        migrations.AlterField(
+            model_name='coincandle',
+            name='open',
+            field=models.DecimalField(decimal_places=12, max_digits=30),
+        ),
+        migrations.AlterField(
+            model_name='coinpricepoint',
+            name='price',
+            field=models.DecimalField(decimal_places=12, max_digits=30),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0020_full_precision_price_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coinpricepoint',
+            index=models.Index(fields=['ts'], name='crypto_coin_ts_cf6b4c_idx'),
+        ),
+    ]
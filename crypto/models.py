@@ -1,7 +1,12 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+from .cache import invalidate_coin_list
+from .sparklines import svg_path
+
 
 class MarketStatistics(models.Model):
     cryptos = models.CharField(max_length=255)
@@ -51,6 +56,12 @@ class CryptoCoin(models.Model):
     circulating_supply = models.CharField(max_length=30)
 
     sparkline_in_7d = models.JSONField(null=True, blank=True)
+    sparkline_svg = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Pre-rendered SVG path of sparkline_in_7d",
+    )
 
     promoted = models.BooleanField(default=False)
     security_badge = models.BooleanField(default=True)
@@ -66,14 +77,171 @@ class CryptoCoin(models.Model):
     trading_view_name = models.CharField(max_length=256, null=True, blank=True)
 
     last_updated = models.DateTimeField(auto_now=True)
+    content_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Fingerprint of the refresh-owned fields",
+    )
 
     class Meta:
         ordering = ["rank"]
+        indexes = [
+            models.Index(fields=["rank", "id"], name="crypto_coin_rank_id_idx"),
+            models.Index(fields=["category", "rank", "id"], name="crypto_coin_cat_rank_id_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.sparkline_svg = svg_path(self.sparkline_in_7d)
+        # A manual save may change refresh-owned fields; forget the fingerprint
+        # so the next refresh rewrites the row from upstream.
+        self.content_hash = ""
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "sparkline_svg", "content_hash"}
+        super().save(*args, **kwargs)
+        invalidate_coin_list()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_coin_list()
+        return result
 
     def __str__(self):
         return f"{self.rank}. {self.name} ({self.symbol})"
 
 
+class CoinMetadata(models.Model):
+    """Slow-changing coin detail fields (logo, description, links) synced in bulk."""
+
+    coin = models.OneToOneField(
+        CryptoCoin, on_delete=models.CASCADE, related_name="metadata"
+    )
+    image = models.URLField(max_length=500, blank=True, default="")
+    description = models.TextField(blank=True, default="")
+    links = models.JSONField(default=dict, blank=True)
+    community_data = models.JSONField(default=dict, blank=True)
+    developer_data = models.JSONField(default=dict, blank=True)
+    synced_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Coin metadata"
+
+    def __str__(self):
+        return f"Metadata for {self.coin}"
+
+    @staticmethod
+    def fields_from_info(info: dict) -> dict:
+        """Model fields from a static detail payload (CoinDetailSerializer schema)."""
+        return {
+            "image": (info.get("image") or {}).get("large") or "",
+            "description": (info.get("description") or {}).get("en") or "",
+            "links": info.get("links") or {},
+            "community_data": info.get("community_data") or {},
+            "developer_data": info.get("developer_data") or {},
+        }
+
+    def as_info(self) -> dict:
+        return {
+            "id": self.coin.coingecko_id,
+            "symbol": self.coin.symbol,
+            "name": self.coin.name,
+            "image": {"large": self.image} if self.image else {},
+            "description": {"en": self.description},
+            "links": self.links,
+            "community_data": self.community_data,
+            "developer_data": self.developer_data,
+        }
+
+
+class CoinPricePoint(models.Model):
+    """Full-precision price observation, one per coin per refresh; kept CRYPTO_PRICE_POINT_RETENTION_DAYS."""
+
+    coin = models.ForeignKey(
+        CryptoCoin, on_delete=models.CASCADE, related_name="price_points"
+    )
+    ts = models.DateTimeField()
+    price = models.DecimalField(max_digits=30, decimal_places=12)
+
+    class Meta:
+        unique_together = ("coin", "ts")
+        indexes = [models.Index(fields=["ts"])]  # retention pruning
+
+    def __str__(self):
+        return f"{self.coin} {self.ts:%Y-%m-%d %H:%M} {self.price}"
+
+
+class CoinCandle(models.Model):
+    """OHLC candle per coin, rolled up from CoinPricePoint as points arrive."""
+
+    INTERVAL_CHOICES = [
+        ("1h", "1 hour"),
+        ("1d", "1 day"),
+    ]
+
+    coin = models.ForeignKey(
+        CryptoCoin, on_delete=models.CASCADE, related_name="candles"
+    )
+    interval = models.CharField(max_length=2, choices=INTERVAL_CHOICES)
+    start = models.DateTimeField()
+    open = models.DecimalField(max_digits=30, decimal_places=12)
+    high = models.DecimalField(max_digits=30, decimal_places=12)
+    low = models.DecimalField(max_digits=30, decimal_places=12)
+    close = models.DecimalField(max_digits=30, decimal_places=12)
+
+    class Meta:
+        unique_together = ("coin", "interval", "start")
+        ordering = ["coin", "interval", "start"]
+
+    def __str__(self):
+        return f"{self.coin} {self.interval} {self.start:%Y-%m-%d %H:%M}"
+
+
+class ListingSnapshot(models.Model):
+    """One CMC /listings/latest pull (raw rows, market cap order), shared by every consumer of a refresh cycle."""
+
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    convert = models.CharField(max_length=10)
+    limit = models.PositiveIntegerField()
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ["-fetched_at"]
+
+    def __str__(self):
+        return f"Top {self.limit} {self.convert} listing at {self.fetched_at:%Y-%m-%d %H:%M}"
+
+
+class CoinRefreshRun(models.Model):
+    """Checkpoint of a top-coins refresh; ``last_page`` is the last committed page."""
+
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("failed", "Failed"),
+        ("completed", "Completed"),
+    ]
+
+    source = models.CharField(max_length=20)
+    limit = models.PositiveIntegerField()
+    vs_currency = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="running")
+    last_page = models.PositiveIntegerField(default=0)
+
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.source} refresh {self.started_at:%Y-%m-%d %H:%M} ({self.status}, page {self.last_page})"
+
+
 class CoinImportRequest(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="coin_imports"
@@ -107,6 +275,10 @@ class CoinImportRequest(models.Model):
         )
 
 
+def vote_today():
+    return timezone.now().date()
+
+
 class CoinVote(models.Model):
     VOTE_CHOICES = [
         ("bullish", "Bullish"),
@@ -118,25 +290,137 @@ class CoinVote(models.Model):
     )
     coin = models.ForeignKey(CryptoCoin, on_delete=models.CASCADE, related_name="votes")
     vote = models.CharField(max_length=10, choices=VOTE_CHOICES)
+    vote_date = models.DateField(default=vote_today, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ("user", "coin", "created_at")
         ordering = ["-created_at"]
+        constraints = [
+            # Only one vote per day per user per coin; a second insert raises IntegrityError
+            models.UniqueConstraint(
+                fields=["user", "coin", "vote_date"], name="unique_daily_coin_vote"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored vote so an edit can move the counters (see signals)
+        instance._loaded_vote = instance.__dict__.get("vote")
+        return instance
 
     def save(self, *args, **kwargs):
-        # Enforce only one vote per day per user per coin
-        today = timezone.now().date()
-        if CoinVote.objects.filter(
-            user=self.user, coin=self.coin, created_at__date=today
-        ).exists():
-            raise ValueError("You can only vote once per day for this coin.")
-        super().save(*args, **kwargs)
+        # The counters are bumped by post_save (crypto.signals); keep both in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
-        return (
-            f"{self.user} voted {self.vote} on {self.coin} ({self.created_at.date()})"
-        )
+        return f"{self.user} voted {self.vote} on {self.coin} ({self.vote_date})"
+
+
+def _bump_counter(model, lookup: dict, deltas: dict) -> None:
+    """
+    Atomically add ``deltas`` ({column: n}) to the row matching ``lookup``.
+    Columns never drop below 0, and a missing row is only created when
+    something is added (decrements may come from a cascade that is
+    deleting the coin itself).
+    """
+    changes = {
+        column: Greatest(F(column) + delta, Value(0)) if delta < 0 else F(column) + delta
+        for column, delta in deltas.items()
+    }
+    if model.objects.filter(**lookup).update(**changes) or not any(d > 0 for d in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{c: max(d, 0) for c, d in deltas.items()})
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**changes)
+
+
+class CoinVoteStats(models.Model):
+    """Running bullish/bearish totals per coin, kept in step with CoinVote."""
+
+    coin = models.OneToOneField(
+        CryptoCoin, on_delete=models.CASCADE, related_name="vote_stats"
+    )
+    bullish = models.PositiveIntegerField(default=0)
+    bearish = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Coin vote stats"
+
+    def __str__(self):
+        return f"{self.coin}: {self.bullish} bullish / {self.bearish} bearish"
+
+    @staticmethod
+    def bump(coin_id: int, day, vote: str, delta: int = 1) -> None:
+        _bump_counter(CoinVoteStats, {"coin_id": coin_id}, {vote: delta})
+        _bump_counter(CoinDailyVoteStats, {"coin_id": coin_id, "day": day}, {vote: delta})
+
+
+class CoinDailyVoteStats(models.Model):
+    """Bullish/bearish totals per coin per day."""
+
+    coin = models.ForeignKey(
+        CryptoCoin, on_delete=models.CASCADE, related_name="daily_vote_stats"
+    )
+    day = models.DateField()
+    bullish = models.PositiveIntegerField(default=0)
+    bearish = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("coin", "day")
+        ordering = ["-day"]
+        verbose_name_plural = "Coin daily vote stats"
+
+    def __str__(self):
+        return f"{self.coin} {self.day}: {self.bullish} bullish / {self.bearish} bearish"
+
+
+class CoinSentimentBucket(models.Model):
+    """Bullish/bearish vote totals per coin per hour or day, rolled up from CoinVote."""
+
+    BUCKET_CHOICES = [
+        ("hour", "Hour"),
+        ("day", "Day"),
+    ]
+
+    coin = models.ForeignKey(
+        CryptoCoin, on_delete=models.CASCADE, related_name="sentiment_buckets"
+    )
+    bucket = models.CharField(max_length=4, choices=BUCKET_CHOICES)
+    start = models.DateTimeField()
+    bullish = models.PositiveIntegerField(default=0)
+    bearish = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("coin", "bucket", "start")
+        ordering = ["coin", "bucket", "start"]
+
+    def __str__(self):
+        return f"{self.coin} {self.bucket} {self.start:%Y-%m-%d %H:%M}: {self.bullish}/{self.bearish}"
+
+
+class SentimentRollupState(models.Model):
+    """
+    Single-row watermark of the sentiment rollup: votes up to
+    ``last_vote_id`` are in CoinSentimentBucket, and raw votes created
+    before ``compacted_before`` have been deleted.
+    """
+
+    last_vote_id = models.BigIntegerField(default=0)
+    compacted_before = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sentiment rollup at vote #{self.last_vote_id}"
+
+    @classmethod
+    def load(cls, for_update: bool = False) -> "SentimentRollupState":
+        queryset = cls.objects.select_for_update() if for_update else cls.objects
+        state, _ = queryset.get_or_create(pk=1)
+        return state
 
 
 class CoinRating(models.Model):
@@ -154,10 +438,58 @@ class CoinRating(models.Model):
     class Meta:
         unique_together = ("user", "coin")  # only one rating per user per coin
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored stars so an edit can move the histogram bucket (see signals)
+        instance._loaded_stars = instance.__dict__.get("stars")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The stats are bumped by post_save (crypto.signals); keep both in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user} rated {self.coin} {self.stars}⭐"
 
 
+class CoinRatingStats(models.Model):
+    """Running rating count, star total and 1-5 star histogram per coin, kept in step with CoinRating."""
+
+    coin = models.OneToOneField(
+        CryptoCoin, on_delete=models.CASCADE, related_name="rating_stats"
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Coin rating stats"
+
+    def __str__(self):
+        return f"{self.coin}: {self.average} ({self.count} ratings)"
+
+    @property
+    def average(self) -> float:
+        return round(self.total / self.count, 2) if self.count else 0
+
+    @property
+    def histogram(self) -> dict:
+        return {str(n): getattr(self, f"stars_{n}") for n in range(1, 6)}
+
+    @staticmethod
+    def bump(coin_id: int, stars: int, delta: int = 1) -> None:
+        deltas = {"count": delta, "total": stars * delta}
+        if 1 <= stars <= 5:
+            deltas[f"stars_{stars}"] = delta
+        _bump_counter(CoinRatingStats, {"coin_id": coin_id}, deltas)
+
+
 class CoinWishlist(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="coin_wishlist"
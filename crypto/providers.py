@@ -0,0 +1,20 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Upstream coin data providers; each module exposes the same public names
+# (update_top_coins, fetch_coin_details, fetch_coin_infos, ...)
+PROVIDERS = {
+    "coingecko": "crypto.services",
+    "cmc": "crypto.services_cmc",
+}
+
+
+def get_provider(name: str = None):
+    """Services module of ``name``, or of CRYPTO_PROVIDER when not given."""
+    name = name or getattr(settings, "CRYPTO_PROVIDER", "coingecko")
+    try:
+        return import_module(PROVIDERS[name])
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown CRYPTO_PROVIDER {name!r}; expected one of {sorted(PROVIDERS)}")
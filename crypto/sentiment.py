@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import CoinSentimentBucket, CoinVote, SentimentRollupState
+from .signals import counters_suspended
+
+logger = logging.getLogger(__name__)
+
+# Votes younger than this are left for the next run, so rows from
+# transactions still in flight are not skipped by the watermark.
+ROLLUP_LAG = getattr(settings, "CRYPTO_SENTIMENT_ROLLUP_LAG", 60)
+VOTE_RETENTION_DAYS = getattr(settings, "CRYPTO_VOTE_RETENTION_DAYS", 90)
+
+BUCKETS = {"hour": TruncHour, "day": TruncDay}
+
+_VOTE_COUNTS = {
+    "bullish": Count("id", filter=Q(vote="bullish")),
+    "bearish": Count("id", filter=Q(vote="bearish")),
+}
+
+
+def _add_to_buckets(votes, bucket: str) -> int:
+    rows = list(
+        votes.order_by()
+        .annotate(start=BUCKETS[bucket]("created_at"))
+        .values("coin_id", "start")
+        .annotate(**_VOTE_COUNTS)
+    )
+    if not rows:
+        return 0
+    existing = {
+        (b.coin_id, b.start): b
+        for b in CoinSentimentBucket.objects.filter(
+            bucket=bucket,
+            coin_id__in={row["coin_id"] for row in rows},
+            start__in={row["start"] for row in rows},
+        )
+    }
+    to_create, to_update = [], []
+    for row in rows:
+        current = existing.get((row["coin_id"], row["start"]))
+        if current is None:
+            to_create.append(CoinSentimentBucket(bucket=bucket, **row))
+            continue
+        current.bullish += row["bullish"]
+        current.bearish += row["bearish"]
+        to_update.append(current)
+    CoinSentimentBucket.objects.bulk_create(to_create)
+    CoinSentimentBucket.objects.bulk_update(to_update, ["bullish", "bearish"])
+    return len(rows)
+
+
+def roll_up_sentiment(batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Add votes newer than the watermark to the hourly and daily buckets.
+
+    Votes are read in id order, ``batch_size`` at a time; each batch and
+    the watermark move are committed together, so an interrupted run never
+    counts a vote twice. Returns ``{"votes": n, "buckets": n}``.
+    """
+    cutoff = timezone.now() - timedelta(seconds=ROLLUP_LAG)
+    votes = buckets = 0
+    while True:
+        with transaction.atomic():
+            state = SentimentRollupState.load(for_update=True)
+            ids = list(
+                CoinVote.objects.filter(id__gt=state.last_vote_id, created_at__lt=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = CoinVote.objects.filter(id__gt=state.last_vote_id, id__lte=ids[-1])
+            for bucket in BUCKETS:
+                buckets += _add_to_buckets(batch, bucket)
+            state.last_vote_id = ids[-1]
+            state.save(update_fields=["last_vote_id", "updated_at"])
+        votes += len(ids)
+        if len(ids) < batch_size:
+            break
+    result = {"votes": votes, "buckets": buckets}
+    logger.info("Sentiment rollup: %s", result)
+    return result
+
+
+@transaction.atomic
+def compact_votes(retention_days: int = VOTE_RETENTION_DAYS) -> int:
+    """
+    Delete raw votes from whole days older than ``retention_days`` that are
+    already rolled up. Their totals stay available from the daily buckets
+    (see ``counters.rebuild_vote_counters``). Returns votes deleted.
+    """
+    state = SentimentRollupState.load(for_update=True)
+    cutoff = (timezone.now() - timedelta(days=retention_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    with counters_suspended():
+        deleted, _ = CoinVote.objects.filter(
+            created_at__lt=cutoff, id__lte=state.last_vote_id
+        ).delete()
+    if state.compacted_before is None or state.compacted_before < cutoff:
+        state.compacted_before = cutoff
+        state.save(update_fields=["compacted_before", "updated_at"])
+    logger.info("Compacted %s votes created before %s", deleted, cutoff)
+    return deleted
+
+
+def sentiment_history(
+    coin_id: int,
+    bucket: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict]:
+    """Rolled-up ``{"start", "bullish", "bearish"}`` rows for one coin, oldest first."""
+    queryset = CoinSentimentBucket.objects.filter(coin_id=coin_id, bucket=bucket)
+    if start:
+        queryset = queryset.filter(start__gte=start)
+    if end:
+        queryset = queryset.filter(start__lt=end)
+    return list(queryset.order_by("start").values("start", "bullish", "bearish"))
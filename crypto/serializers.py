@@ -1,6 +1,7 @@
-from django.utils import timezone
+from django.db import IntegrityError
 from rest_framework import serializers
 
+from . import sparklines
 from .models import (
     Category,
     CoinRating,
@@ -32,7 +33,57 @@ class CryptoCoinSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CryptoCoin
-        fields = "__all__"
+        exclude = ["content_hash", "sparkline_svg"]
+
+
+class CryptoCoinListSerializer(serializers.ModelSerializer):
+    """
+    Ranking table rows. The 7-day sparkline is left out unless the
+    "sparkline" context is one of ``SPARKLINE_MODES``.
+    """
+
+    SPARKLINE_MODES = ("compact", "delta", "full")
+
+    category = CategorySerializer(read_only=True)
+    average_rating = serializers.SerializerMethodField()
+    sparkline = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CryptoCoin
+        fields = [
+            "id",
+            "coingecko_id",
+            "rank",
+            "name",
+            "symbol",
+            "price",
+            "percent_change_1h",
+            "percent_change_24h",
+            "percent_change_7d",
+            "market_cap",
+            "volume_24h",
+            "circulating_supply",
+            "promoted",
+            "security_badge",
+            "category",
+            "trading_view_name",
+            "last_updated",
+            "average_rating",
+            "sparkline",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.context.get("sparkline") not in self.SPARKLINE_MODES:
+            self.fields.pop("sparkline")
+
+    def get_average_rating(self, obj):
+        # Callers select_related("rating_stats") so this costs no query
+        stats = getattr(obj, "rating_stats", None)
+        return stats.average if stats else 0
+
+    def get_sparkline(self, obj):
+        return sparklines.compact(obj.sparkline_in_7d, self.context["sparkline"])
 
 
 class CoinDetailSerializer(serializers.Serializer):
@@ -58,18 +109,15 @@ class CoinVoteSerializer(serializers.ModelSerializer):
         fields = ["id", "coin", "vote", "created_at"]
         read_only_fields = ["id", "created_at"]
 
-    def validate(self, data):
-        user = self.context["request"].user
-        coin = data["coin"]
-        today = timezone.now().date()
-
-        if CoinVote.objects.filter(
-            user=user, coin=coin, created_at__date=today
-        ).exists():
+    def create(self, validated_data):
+        # The daily uniqueness is enforced by the (user, coin, vote_date)
+        # constraint, so a duplicate costs one failed insert and no lookup.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
                 "You have already voted today for this coin."
             )
-        return data
 
 
 class CoinRatingSerializer(serializers.ModelSerializer):
@@ -1,9 +1,12 @@
 import logging
+import math
 
 from coingecko_sdk import Coingecko
 from django.conf import settings
 
+from .concurrency import fetch_pages
 from .models import Category, CoinImportRequest, CryptoCoin
+from .sync import refresh_top_coins
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,26 @@ client = Coingecko(
 GECKOTERMINAL_BASE_URL = "https://api.geckoterminal.com/api/v2"
 
 
+def _map_market_item(coin, category) -> dict:
+    return {
+        "coingecko_id": coin.id,
+        "rank": coin.market_cap_rank,
+        "name": coin.name,
+        "symbol": coin.symbol.upper(),
+        "price": coin.current_price,
+        "percent_change_1h": coin.price_change_percentage_1h_in_currency or 0,
+        "percent_change_24h": coin.price_change_percentage_24h_in_currency or 0,
+        "percent_change_7d": coin.price_change_percentage_7d_in_currency or 0,
+        "market_cap": str(coin.market_cap),
+        "volume_24h": str(coin.total_volume),
+        "circulating_supply": str(coin.circulating_supply),
+        "sparkline_in_7d": coin.sparkline_in_7d["price"]
+        if coin.sparkline_in_7d
+        else None,
+        "category": category,
+    }
+
+
 def fetch_top_coin_by_symbol(symbol: str, category_name: str = "Top"):
     """
     Update coin data using CoinGecko (for major tokens)
@@ -32,33 +55,20 @@ def fetch_top_coin_by_symbol(symbol: str, category_name: str = "Top"):
         logger.warning(f"No data found for symbol {symbol} on CoinGecko")
         return
 
-    coin = coin[0]
+    return _map_market_item(coin[0], category)
 
-    return {
-        "coingecko_id": coin.id,
-        "rank": coin.market_cap_rank,
-        "name": coin.name,
-        "symbol": coin.symbol.upper(),
-        "price": coin.current_price,
-        "percent_change_1h": coin.price_change_percentage_1h_in_currency or 0,
-        "percent_change_24h": coin.price_change_percentage_24h_in_currency or 0,
-        "percent_change_7d": coin.price_change_percentage_7d_in_currency or 0,
-        "market_cap": str(coin.market_cap),
-        "volume_24h": str(coin.total_volume),
-        "circulating_supply": str(coin.circulating_supply),
-        "sparkline_in_7d": coin.sparkline_in_7d["price"]
-        if coin.sparkline_in_7d
-        else None,
-        "category": category,
-    }
 
+def iter_top_coin_pages(limit=1000, vs_currency="usd", start_page=1):
+    """
+    Yield ``(page, coins)`` for CoinGecko market pages (250 rows) in rank order.
 
-def fetch_top_coins(limit=1000, vs_currency="usd"):
-    """Fetch top coins from CoinGecko (unchanged)"""
-    all_coins = []
-    per_page = 250
-    for page in range(1, (limit // per_page) + 1):
-        data = client.coins.markets.get(
+    Pages are fetched concurrently, bounded by CRYPTO_FETCH_CONCURRENCY and
+    throttled to CRYPTO_FETCH_REQUESTS_PER_MINUTE.
+    """
+    per_page = min(250, limit)
+
+    def fetch(page):
+        return client.coins.markets.get(
             vs_currency=vs_currency,
             order="market_cap_desc",
             per_page=per_page,
@@ -66,37 +76,41 @@ def fetch_top_coins(limit=1000, vs_currency="usd"):
             sparkline=True,
             price_change_percentage="1h,24h,7d",
         )
-        if not data:
+
+    remaining = limit - (start_page - 1) * per_page
+    for page, data in fetch_pages(
+        fetch,
+        range(start_page, math.ceil(limit / per_page) + 1),
+        max_workers=getattr(settings, "CRYPTO_FETCH_CONCURRENCY", 4),
+        requests_per_minute=getattr(settings, "CRYPTO_FETCH_REQUESTS_PER_MINUTE", None),
+    ):
+        yield page, data[:remaining]
+        remaining -= len(data)
+        if remaining <= 0:
             break
-        all_coins.extend(data)
-    return all_coins[:limit]
+
+
+def fetch_top_coins(limit=1000, vs_currency="usd"):
+    """Fetch top coins from CoinGecko"""
+    all_coins = []
+    for _, coins in iter_top_coin_pages(limit=limit, vs_currency=vs_currency):
+        all_coins.extend(coins)
+    return all_coins
 
 
 def update_top_coins(limit=1000, vs_currency="usd"):
-    """Update top coins from CoinGecko (unchanged)"""
-    coins = fetch_top_coins(limit=limit, vs_currency=vs_currency)
+    """
+    Stream top coins from CoinGecko into the bulk sync engine, checkpointing
+    after every page
+    """
     category, _ = Category.objects.get_or_create(name="Top")
-
-    for coin in coins:
-        CryptoCoin.objects.update_or_create(
-            coingecko_id=coin.id,
-            defaults={
-                "rank": coin.market_cap_rank,
-                "name": coin.name,
-                "symbol": coin.symbol.upper(),
-                "price": coin.current_price,
-                "percent_change_1h": coin.price_change_percentage_1h_in_currency or 0,
-                "percent_change_24h": coin.price_change_percentage_24h_in_currency or 0,
-                "percent_change_7d": coin.price_change_percentage_7d_in_currency or 0,
-                "market_cap": str(coin.market_cap),
-                "volume_24h": str(coin.total_volume),
-                "circulating_supply": str(coin.circulating_supply),
-                "sparkline_in_7d": coin.sparkline_in_7d["price"]
-                if coin.sparkline_in_7d
-                else None,
-                "category": category,
-            },
-        )
+    return refresh_top_coins(
+        "coingecko",
+        lambda start_page: iter_top_coin_pages(limit, vs_currency, start_page),
+        lambda coin: _map_market_item(coin, category),
+        limit=limit,
+        vs_currency=vs_currency,
+    )
 
 
 def fetch_coin_detail(coin_id: str):
@@ -114,6 +128,87 @@ def fetch_coin_detail(coin_id: str):
     )
 
 
+INFO_KEYS = ("id", "symbol", "name", "image", "description", "links", "community_data", "developer_data")
+MARKET_KEYS = ("market_data", "tickers", "sparkline_in_7d", "last_updated")
+
+
+def _pick(detail, keys) -> dict:
+    if detail and hasattr(detail, "to_dict"):
+        detail = detail.to_dict()
+    if not detail:
+        return None
+    return {k: detail[k] for k in keys if k in detail}
+
+
+def fetch_coin_info(coin_id: str):
+    """Static part of the coin detail (logo, description, links, ...)"""
+    detail = client.coins.get_id(
+        id=coin_id,
+        localization=True,
+        tickers=False,
+        market_data=False,
+        community_data=True,
+        developer_data=True,
+        sparkline=False,
+    )
+    return _pick(detail, INFO_KEYS)
+
+
+def fetch_coin_market(coin_id: str):
+    """Volatile part of the coin detail (prices, tickers, sparkline)"""
+    detail = client.coins.get_id(
+        id=coin_id,
+        localization=False,
+        tickers=True,
+        market_data=True,
+        community_data=False,
+        developer_data=False,
+        sparkline=True,
+    )
+    return _pick(detail, MARKET_KEYS)
+
+
+def _fetch_many(fetch_one, coin_ids) -> dict:
+    # CoinGecko has no multi-coin detail endpoint; fan out under the fetch budget
+    def fetch(coin_id):
+        # One bad coin must not abort the batch; it is simply left out
+        try:
+            return coin_id, fetch_one(coin_id)
+        except Exception:
+            logger.exception("CoinGecko fetch failed for %s", coin_id)
+            return coin_id, None
+
+    out = {}
+    for coin_id, (_, data) in fetch_pages(
+        fetch,
+        coin_ids,
+        max_workers=getattr(settings, "CRYPTO_FETCH_CONCURRENCY", 4),
+        requests_per_minute=getattr(settings, "CRYPTO_FETCH_REQUESTS_PER_MINUTE", None),
+    ):
+        if data:
+            out[coin_id] = data
+    return out
+
+
+def fetch_coin_infos(coin_ids) -> dict:
+    return _fetch_many(fetch_coin_info, coin_ids)
+
+
+def fetch_coin_markets(coin_ids) -> dict:
+    return _fetch_many(fetch_coin_market, coin_ids)
+
+
+def fetch_coin_details(coin_ids) -> dict:
+    """Detail payloads for many coins, merged like ``fetch_coin_detail`` (same name as services_cmc)."""
+    infos = fetch_coin_infos(coin_ids)
+    markets = fetch_coin_markets(list(infos))
+    return {
+        coin_id: {**info, **markets[coin_id]}
+        for coin_id, info in infos.items()
+        if coin_id in markets
+    }
+
+
 def import_coin(
     user,
     symbol,
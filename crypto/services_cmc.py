@@ -2,29 +2,19 @@
 import logging
 from typing import Dict, Any, List, Optional
 
-import requests
 from django.conf import settings
 
+from .cmc_client import cmc_get
+from .listings import iter_listing_pages
 from .models import Category, CryptoCoin
+from .sync import refresh_top_coins
 
 logger = logging.getLogger(__name__)
 
-CMC_BASE = "https://pro-api.coinmarketcap.com/v1"
-SESSION = requests.Session()
-SESSION.headers.update({
-    "X-CMC_PRO_API_KEY": settings.CMC_PRO_API_KEY,
-    "Accept": "application/json",
-})
 
 def _cmc_get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    url = f"{CMC_BASE}{path}"
-    r = SESSION.get(url, params=params, timeout=20)
-    try:
-        r.raise_for_status()
-    except Exception:
-        logger.exception("CMC error %s %s -> %s", path, params, r.text[:500])
-        raise
-    return r.json()
+    # Shared rate-limited client; callers read the payload's "data"
+    return {"data": cmc_get(f"/v1{path}", params)}
 
 # ---------- MAPPERS ----------
 
@@ -100,73 +90,49 @@ def fetch_top_coin_by_symbol(symbol: str, category_name: str = "Top"):
     return mapped
 
 
-def fetch_top_coins(limit=1000, vs_currency="usd"):
+def iter_top_coin_pages(limit=1000, vs_currency="usd", start_page=1):
     """
-    Use /listings/latest with pagination (250/page like before).
+    Yield ``(page, coins)`` for mapped /listings/latest pages (250/page like
+    before) in rank order.
+
+    Pages come from crypto.listings: sliced from a fresh shared snapshot, or
+    fetched concurrently and yielded as they arrive (a full pull then
+    becomes the snapshot the market boxes read).
     """
     quote = (vs_currency or "usd").upper()
-    per_page = 250
+    for page, rows in iter_listing_pages(limit, quote, start_page):
+        yield page, [_map_listing_item(it, quote_symbol=quote) for it in rows]
+
+
+def fetch_top_coins(limit=1000, vs_currency="usd"):
     results: List[Dict[str, Any]] = []
-    start = 1
-    while len(results) < limit:
-        page_limit = min(per_page, limit - len(results))
-        payload = _cmc_get(
-            "/cryptocurrency/listings/latest",
-            {"start": start, "limit": page_limit, "convert": quote, "sort": "market_cap"}
-        )
-        batch = [_map_listing_item(it, quote_symbol=quote) for it in payload.get("data", [])]
-        if not batch:
-            break
+    for _, batch in iter_top_coin_pages(limit=limit, vs_currency=vs_currency):
         results.extend(batch)
-        start += page_limit
     return results[:limit]
 
 
-def update_top_coins(limit=1000, vs_currency="usd"):
-    coins = fetch_top_coins(limit=limit, vs_currency=vs_currency)
-    category, _ = Category.objects.get_or_create(name="Top")
+def _to_sync_row(c: Dict[str, Any], category: Category) -> Dict[str, Any]:
+    # CryptoCoin has a single external id column; under CMC it carries the
+    # numeric CMC id, which is also what fetch_coin_detail() accepts.
+    return {**c, "coingecko_id": str(c["cmc_id"]) if c.get("cmc_id") else None, "category": category}
 
-    for c in coins:
-        # Prefer cmc_id when present; fall back to symbol
-        lookup_kwargs = {"cmc_id": c.get("cmc_id")} if c.get("cmc_id") else {"symbol": c["symbol"]}
-        defaults = {
-            "rank": c["rank"],
-            "name": c["name"],
-            "symbol": c["symbol"],
-            "price": c["price"],
-            "percent_change_1h": c["percent_change_1h"],
-            "percent_change_24h": c["percent_change_24h"],
-            "percent_change_7d": c["percent_change_7d"],
-            "market_cap": c["market_cap"],
-            "volume_24h": c["volume_24h"],
-            "circulating_supply": c["circulating_supply"],
-            "sparkline_in_7d": c["sparkline_in_7d"],
-            "category": category,
-            "slug": c.get("slug"),
-        }
-        CryptoCoin.objects.update_or_create(**lookup_kwargs, defaults=defaults)
 
+def update_top_coins(limit=1000, vs_currency="usd"):
+    category, _ = Category.objects.get_or_create(name="Top")
+    return refresh_top_coins(
+        "cmc",
+        lambda start_page: iter_top_coin_pages(limit, vs_currency, start_page),
+        lambda c: _to_sync_row(c, category),
+        limit=limit,
+        vs_currency=vs_currency,
+    )
 
-def fetch_coin_detail(coin_id: str):
-    """
-    Previously: CoinGecko coins.get_id(...)
-    With CMC: combine /info and /quotes/latest by id or by symbol.
-    Here we accept CMC numeric ID *or* symbol string.
-    """
-    quote = getattr(settings, "CMC_DEFAULT_FIAT", "USD")
 
-    # Decide if `coin_id` is numeric CMC id or a symbol
-    is_numeric = str(coin_id).isdigit()
-    key = "id" if is_numeric else "symbol"
-    # /info
-    info = _cmc_get("/cryptocurrency/info", {key: coin_id})
-    info_data = list(info.get("data", {}).values())[0]
+DETAIL_BATCH_SIZE = getattr(settings, "CMC_DETAIL_BATCH_SIZE", 100)
 
-    # /quotes/latest
-    quotes = _cmc_get("/cryptocurrency/quotes/latest", {key: coin_id, "convert": quote})
-    quotes_data = list(quotes.get("data", {}).values())[0]
 
-    # Build a dict close to your CoinDetailSerializer schema
+def _map_info(info_data: Dict[str, Any]) -> Dict[str, Any]:
+    urls = info_data.get("urls", {})
     return {
         "id": str(info_data["id"]),
         "symbol": info_data["symbol"],
@@ -174,30 +140,105 @@ def fetch_coin_detail(coin_id: str):
         "image": {"large": info_data.get("logo")},
         "description": {"en": (info_data.get("description") or "")},
         "links": {
-            "website": info_data.get("urls", {}).get("website", []),
-            "source_code": info_data.get("urls", {}).get("source_code", []),
-            "twitter": info_data.get("urls", {}).get("twitter", []),
-            "reddit": info_data.get("urls", {}).get("reddit", []),
-            "message_board": info_data.get("urls", {}).get("message_board", []),
-            "chat": info_data.get("urls", {}).get("chat", []),
+            "website": urls.get("website", []),
+            "source_code": urls.get("source_code", []),
+            "twitter": urls.get("twitter", []),
+            "reddit": urls.get("reddit", []),
+            "message_board": urls.get("message_board", []),
+            "chat": urls.get("chat", []),
         },
+        "community_data": {},
+        "developer_data": {},
+    }
+
+
+def _map_market(quotes_data: Dict[str, Any], quote: str) -> Dict[str, Any]:
+    q = quotes_data["quote"][quote]
+    return {
         "market_data": {
-            "current_price": {quote: quotes_data["quote"][quote]["price"]},
-            "market_cap": {quote: quotes_data["quote"][quote]["market_cap"]},
-            "price_change_percentage_1h_in_currency": {quote: quotes_data["quote"][quote]["percent_change_1h"]},
-            "price_change_percentage_24h_in_currency": {quote: quotes_data["quote"][quote]["percent_change_24h"]},
-            "price_change_percentage_7d_in_currency": {quote: quotes_data["quote"][quote]["percent_change_7d"]},
-            "total_volume": {quote: quotes_data["quote"][quote]["volume_24h"]},
+            "current_price": {quote: q["price"]},
+            "market_cap": {quote: q["market_cap"]},
+            "price_change_percentage_1h_in_currency": {quote: q["percent_change_1h"]},
+            "price_change_percentage_24h_in_currency": {quote: q["percent_change_24h"]},
+            "price_change_percentage_7d_in_currency": {quote: q["percent_change_7d"]},
+            "total_volume": {quote: q["volume_24h"]},
             "circulating_supply": quotes_data.get("circulating_supply"),
         },
         "tickers": [],  # CMC exposes market pairs via /market-pairs/latest if/when you need it
-        "community_data": {},
-        "developer_data": {},
         "sparkline_in_7d": {},  # fill from OHLCV if you enable it
         "last_updated": quotes_data["last_updated"],
     }
 
 
+def _batched_get(path: str, coin_ids: List[str], params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Call a multi-coin endpoint once per DETAIL_BATCH_SIZE ids (or symbols)
+    and return the raw items keyed by the requested id.
+    """
+    # `coin_id` is either a numeric CMC id or a symbol; CMC takes one kind per call
+    ids = [str(c) for c in coin_ids if str(c).isdigit()]
+    symbols = [str(c) for c in coin_ids if not str(c).isdigit()]
+    out: Dict[str, Dict[str, Any]] = {}
+    for key, values in (("id", ids), ("symbol", symbols)):
+        for i in range(0, len(values), DETAIL_BATCH_SIZE):
+            chunk = values[i:i + DETAIL_BATCH_SIZE]
+            payload = _cmc_get(path, {**params, key: ",".join(chunk), "skip_invalid": "true"})
+            data = payload.get("data", {})
+            for requested in chunk:
+                item = data.get(requested if key == "id" else requested.upper())
+                if isinstance(item, list):
+                    item = item[0] if item else None
+                if item:
+                    out[requested] = item
+    return out
+
+
+def fetch_coin_infos(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Static detail parts for many coins, one /info call per batch."""
+    raw = _batched_get("/cryptocurrency/info", coin_ids, {})
+    return {coin_id: _map_info(item) for coin_id, item in raw.items()}
+
+
+def fetch_coin_markets(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Volatile detail parts for many coins, one /quotes/latest call per batch."""
+    quote = getattr(settings, "CMC_DEFAULT_FIAT", "USD")
+    raw = _batched_get("/cryptocurrency/quotes/latest", coin_ids, {"convert": quote})
+    return {coin_id: _map_market(item, quote) for coin_id, item in raw.items()}
+
+
+def fetch_coin_details(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Detail payloads (CoinDetailSerializer schema) for up to many coins using
+    one /info and one /quotes/latest call per batch.
+    """
+    infos = fetch_coin_infos(coin_ids)
+    markets = fetch_coin_markets(list(infos))
+    return {
+        coin_id: {**info, **markets[coin_id]}
+        for coin_id, info in infos.items()
+        if coin_id in markets
+    }
+
+
+def fetch_coin_info(coin_id: str) -> Optional[Dict[str, Any]]:
+    """Static part of the coin detail, from /info."""
+    return fetch_coin_infos([coin_id]).get(str(coin_id))
+
+
+def fetch_coin_market(coin_id: str) -> Optional[Dict[str, Any]]:
+    """Volatile part of the coin detail, from /quotes/latest."""
+    return fetch_coin_markets([coin_id]).get(str(coin_id))
+
+
+def fetch_coin_detail(coin_id: str):
+    """
+    Previously: CoinGecko coins.get_id(...)
+    With CMC: combine /info and /quotes/latest by id or by symbol.
+    Here we accept CMC numeric ID *or* symbol string.
+    """
+    return fetch_coin_details([coin_id]).get(str(coin_id))
+
+
 def import_coin(user, symbol, category="Top", trading_view_name=None):
     try:
         symbol = (symbol or "").upper().strip()
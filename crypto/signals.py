@@ -0,0 +1,64 @@
+"""
+Counter bookkeeping for coin votes and ratings. Receivers rather than save()/delete()
+overrides, so queryset deletes and cascades (deleting a user or a coin)
+keep the counters in step too.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CoinRating, CoinRatingStats, CoinVote, CoinVoteStats
+
+_suspended = ContextVar("crypto_counters_suspended", default=False)
+
+
+@contextmanager
+def counters_suspended():
+    """Delete rows without touching their counters (e.g. vote compaction keeps the totals)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+@receiver(post_save, sender=CoinVote, dispatch_uid="crypto.coin_vote_saved")
+def coin_vote_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    old_vote = getattr(instance, "_loaded_vote", None)
+    if created:
+        CoinVoteStats.bump(instance.coin_id, instance.vote_date, instance.vote)
+    elif old_vote is not None and old_vote != instance.vote:
+        CoinVoteStats.bump(instance.coin_id, instance.vote_date, old_vote, -1)
+        CoinVoteStats.bump(instance.coin_id, instance.vote_date, instance.vote)
+    instance._loaded_vote = instance.vote
+
+
+@receiver(post_delete, sender=CoinVote, dispatch_uid="crypto.coin_vote_deleted")
+def coin_vote_deleted(sender, instance, **kwargs):
+    if _suspended.get():
+        return
+    CoinVoteStats.bump(instance.coin_id, instance.vote_date, instance.vote, -1)
+
+
+@receiver(post_save, sender=CoinRating, dispatch_uid="crypto.coin_rating_saved")
+def coin_rating_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    old_stars = getattr(instance, "_loaded_stars", None)
+    if created:
+        CoinRatingStats.bump(instance.coin_id, instance.stars)
+    elif old_stars is not None and old_stars != instance.stars:
+        CoinRatingStats.bump(instance.coin_id, old_stars, -1)
+        CoinRatingStats.bump(instance.coin_id, instance.stars)
+    instance._loaded_stars = instance.stars
+
+
+@receiver(post_delete, sender=CoinRating, dispatch_uid="crypto.coin_rating_deleted")
+def coin_rating_deleted(sender, instance, **kwargs):
+    if _suspended.get():
+        return
+    CoinRatingStats.bump(instance.coin_id, instance.stars, -1)
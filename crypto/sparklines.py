@@ -0,0 +1,72 @@
+import math
+from typing import List, Optional, Sequence
+
+COMPACT_POINTS = 24
+
+
+def downsample(points: Sequence[float], size: int = COMPACT_POINTS) -> List[float]:
+    """Evenly spaced subset of ``points`` that keeps the first and last value."""
+    points = list(points or [])
+    if len(points) <= size or size < 2:
+        return points
+    step = (len(points) - 1) / (size - 1)
+    return [points[round(i * step)] for i in range(size)]
+
+
+def _decimals(value: float, significant: int = 6) -> int:
+    if not value:
+        return significant
+    return max(0, significant - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def delta_encode(points: Sequence[float], significant: int = 6) -> List[float]:
+    """
+    ``[p0, p1 - p0, p2 - p1, ...]`` rounded to ``significant`` digits of the
+    first value; decode with a running sum.
+    """
+    points = list(points or [])
+    if not points:
+        return []
+    decimals = _decimals(points[0], significant)
+    rounded = [round(p, decimals) for p in points]
+    return [rounded[0]] + [
+        round(b - a, decimals) for a, b in zip(rounded, rounded[1:])
+    ]
+
+
+def compact(points: Optional[Sequence[float]], mode: str):
+    """Sparkline in list form for ``mode`` ("compact", "delta" or "full")."""
+    if not points:
+        return None
+    if mode == "full":
+        return list(points)
+    small = downsample(points, COMPACT_POINTS)
+    return delta_encode(small) if mode == "delta" else small
+
+
+SVG_WIDTH = 100
+SVG_HEIGHT = 30
+SVG_POINTS = 56
+
+
+def svg_path(
+    points: Optional[Sequence[float]],
+    width: int = SVG_WIDTH,
+    height: int = SVG_HEIGHT,
+    size: int = SVG_POINTS,
+) -> str:
+    """
+    SVG path ``d`` attribute for a sparkline scaled into a ``width`` x
+    ``height`` box (y grows downwards), or "" when there is nothing to draw.
+    """
+    small = [p for p in downsample(points, size) if p is not None]
+    if len(small) < 2:
+        return ""
+    low, high = min(small), max(small)
+    span = (high - low) or 1
+    step = width / (len(small) - 1)
+    coords = [
+        f"{i * step:.1f},{height - (p - low) / span * height:.1f}"
+        for i, p in enumerate(small)
+    ]
+    return "M" + "L".join(coords)
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import logging
+from decimal import Decimal
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .cache import invalidate_coin_list
+from .coin_list import prerender_coin_list
+from .history import prune_price_points, record_prices
+from .models import CoinMetadata, CoinRefreshRun, CryptoCoin
+from .sparklines import svg_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Sent (sender=CryptoCoin, source=...) after each completed top-coins refresh;
+# other apps derive their own data from the fresh rows (e.g. marketglobal indices)
+coins_refreshed = Signal()
+
+# Columns owned by the top-coins refresh; everything else (promoted,
+# security_badge, trading_view_name, ...) is left alone.
+SYNC_FIELDS = [
+    "rank",
+    "name",
+    "symbol",
+    "price",
+    "percent_change_1h",
+    "percent_change_24h",
+    "percent_change_7d",
+    "market_cap",
+    "volume_24h",
+    "circulating_supply",
+    "sparkline_in_7d",
+    "category",
+]
+
+# Price history keeps the upstream precision (CryptoCoin.price has 2 places)
+HISTORY_PRICE_PLACES = Decimal("1e-12")
+
+DECIMAL_PLACES = {
+    "price": Decimal("0.01"),
+    "percent_change_1h": Decimal("0.01"),
+    "percent_change_24h": Decimal("0.01"),
+    "percent_change_7d": Decimal("0.01"),
+}
+
+
+def _to_decimal(value, places: Decimal) -> Decimal:
+    return Decimal(str(value or 0)).quantize(places)
+
+
+def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce a mapped coin row to the values the DB will hand back."""
+    out = {}
+    for field in SYNC_FIELDS:
+        value = row.get(field)
+        if field in DECIMAL_PLACES:
+            value = _to_decimal(value, DECIMAL_PLACES[field])
+        elif field == "category":
+            value = value.pk if value is not None else None
+        out[field] = value
+    return out
+
+
+def fingerprint(fields: Dict[str, Any]) -> str:
+    """Stable hash of normalized refresh fields (see ``_normalize``)."""
+    payload = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def sync_coins(
+    rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[str, int]:
+    """
+    Upsert mapped coin rows keyed by ``coingecko_id``.
+
+    Existing ``(coingecko_id, pk, content_hash)`` rows for the
+    incoming keys are loaded in one query per chunk; a row is only
+    rewritten when the fingerprint of its incoming fields differs from the
+    stored one, so ``last_updated`` moves only when the data does. New
+    coins go through ``bulk_create`` and changed coins through
+    ``bulk_update`` in chunks, and every coin gets a full-precision price
+    history point (see ``history.record_prices``), all inside a single
+    transaction.
+
+    Returns ``{"inserted": n, "updated": n, "unchanged": n}``.
+    """
+    incoming: Dict[str, Dict[str, Any]] = {}
+    prices: Dict[str, Decimal] = {}
+    for row in rows:
+        key = row.get("coingecko_id")
+        if key and key not in incoming:
+            incoming[key] = _normalize(row)
+            prices[key] = _to_decimal(row.get("price"), HISTORY_PRICE_PLACES)
+
+    now = timezone.now()
+    to_create: List[CryptoCoin] = []
+    to_update: List[CryptoCoin] = []
+    unchanged = 0
+
+    with transaction.atomic():
+        existing = {}
+        for keys in _chunks(list(incoming), chunk_size):
+            for key, pk, content_hash in CryptoCoin.objects.filter(
+                coingecko_id__in=keys
+            ).values_list("coingecko_id", "pk", "content_hash").order_by("pk"):
+                existing.setdefault(key, (pk, content_hash))
+
+        for key, fields in incoming.items():
+            current = existing.get(key)
+            digest = fingerprint(fields)
+            if current is not None and current[1] == digest:
+                unchanged += 1
+                continue
+            attrs = {f: v for f, v in fields.items() if f != "category"}
+            attrs["category_id"] = fields["category"]
+            attrs["sparkline_svg"] = svg_path(fields["sparkline_in_7d"])
+            if current is None:
+                to_create.append(CryptoCoin(coingecko_id=key, content_hash=digest, **attrs))
+            else:
+                to_update.append(
+                    CryptoCoin(pk=current[0], content_hash=digest, last_updated=now, **attrs)
+                )
+
+        for batch in _chunks(to_create, chunk_size):
+            CryptoCoin.objects.bulk_create(batch)
+        for batch in _chunks(to_update, chunk_size):
+            CryptoCoin.objects.bulk_update(
+                batch, SYNC_FIELDS + ["sparkline_svg", "content_hash", "last_updated"]
+            )
+
+        # One point per coin per refresh, unchanged rows included, so candles have no gaps
+        pks = {key: current[0] for key, current in existing.items()}
+        pks.update((coin.coingecko_id, coin.pk) for coin in to_create)
+        record_prices({pks[key]: price for key, price in prices.items()}, now)
+
+    if to_create or to_update:
+        # New coins or category moves change list counts
+        invalidate_coin_list()
+
+    result = {"inserted": len(to_create), "updated": len(to_update), "unchanged": unchanged}
+    logger.info("Coin sync: %s", result)
+    return result
+
+
+def _resumable_run(source: str, limit: int, vs_currency: str):
+    """
+    Claim the latest resumable run: a failed one, or a "running" one whose
+    checkpoint has not moved for CRYPTO_REFRESH_HEARTBEAT seconds (its
+    process died). Runs still in progress elsewhere are left alone.
+    """
+    now = timezone.now()
+    window = getattr(settings, "CRYPTO_REFRESH_RESUME_WINDOW", 15 * 60)
+    heartbeat = getattr(settings, "CRYPTO_REFRESH_HEARTBEAT", 5 * 60)
+    run = (
+        CoinRefreshRun.objects.filter(
+            Q(status="failed") | Q(status="running", updated_at__lt=now - timedelta(seconds=heartbeat)),
+            source=source,
+            limit=limit,
+            vs_currency=vs_currency,
+            updated_at__gte=now - timedelta(seconds=window),
+        )
+        .order_by("-started_at")
+        .first()
+    )
+    if run is None:
+        return None
+    # Compare-and-set on the checkpoint so two restarts never share a run
+    claimed = CoinRefreshRun.objects.filter(pk=run.pk, updated_at=run.updated_at).update(
+        status="running", updated_at=now
+    )
+    if not claimed:
+        return None
+    run.status, run.updated_at = "running", now
+    return run
+
+
+def refresh_top_coins(
+    source: str,
+    iter_pages: Callable[[int], Iterator[Tuple[int, List[Any]]]],
+    map_row: Callable[[Any], Dict[str, Any]],
+    limit: int = 1000,
+    vs_currency: str = "usd",
+) -> Dict[str, int]:
+    """
+    Stream ``iter_pages(start_page)`` into ``sync_coins`` page by page.
+
+    Each page is written together with its checkpoint on a
+    ``CoinRefreshRun`` row, so only one page of coins is held in memory and
+    an interrupted run picks up after its last committed page when it is
+    restarted within CRYPTO_REFRESH_RESUME_WINDOW seconds. Once complete,
+    the first coin list pages are pre-rendered into the cache, raw price
+    points past CRYPTO_PRICE_POINT_RETENTION_DAYS are pruned and
+    ``coins_refreshed`` is sent.
+    """
+    run = _resumable_run(source, limit, vs_currency)
+    if run:
+        logger.info("Resuming %s refresh #%s after page %s", source, run.pk, run.last_page)
+    else:
+        run = CoinRefreshRun.objects.create(source=source, limit=limit, vs_currency=vs_currency)
+
+    try:
+        for page, items in iter_pages(run.last_page + 1):
+            with transaction.atomic():
+                result = sync_coins(map_row(item) for item in items)
+                run.last_page = page
+                run.inserted += result["inserted"]
+                run.updated += result["updated"]
+                run.unchanged += result["unchanged"]
+                run.status = "running"
+                run.save(update_fields=["last_page", "inserted", "updated", "unchanged", "status", "updated_at"])
+    except Exception:
+        run.status = "failed"
+        run.save(update_fields=["status", "updated_at"])
+        raise
+
+    run.status = "completed"
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "finished_at", "updated_at"])
+
+    try:
+        prerender_coin_list()
+    except Exception:
+        logger.exception("Pre-rendering coin list pages failed")
+    try:
+        prune_price_points()
+    except Exception:
+        logger.exception("Pruning price points failed")
+    coins_refreshed.send_robust(sender=CryptoCoin, source=source)
+    return {"inserted": run.inserted, "updated": run.updated, "unchanged": run.unchanged}
+
+
+def sync_coin_metadata(
+    coins: Iterable[CryptoCoin],
+    fetch_infos: Callable[[List[str]], Dict[str, Dict[str, Any]]],
+    chunk_size: int = 100,
+) -> Dict[str, int]:
+    """
+    Refresh ``CoinMetadata`` for ``coins`` from a batch info fetcher keyed by
+    ``coingecko_id``, one fetch and one bulk write per chunk.
+    """
+    created = updated = 0
+    for batch in _chunks(list(coins), chunk_size):
+        by_key = {coin.coingecko_id: coin for coin in batch}
+        infos = fetch_infos(list(by_key))
+        now = timezone.now()
+        with transaction.atomic():
+            existing = {
+                m.coin_id: m
+                for m in CoinMetadata.objects.filter(coin_id__in=[c.pk for c in batch])
+            }
+            to_create, to_update = [], []
+            for key, info in infos.items():
+                coin = by_key.get(key)
+                if coin is None:
+                    continue
+                fields = CoinMetadata.fields_from_info(info)
+                meta = existing.get(coin.pk)
+                if meta is None:
+                    to_create.append(CoinMetadata(coin=coin, synced_at=now, **fields))
+                    continue
+                for name, value in fields.items():
+                    setattr(meta, name, value)
+                meta.synced_at = now
+                to_update.append(meta)
+            CoinMetadata.objects.bulk_create(to_create)
+            CoinMetadata.objects.bulk_update(to_update, list(CoinMetadata.fields_from_info({})) + ["synced_at"])
+        created += len(to_create)
+        updated += len(to_update)
+    result = {"created": created, "updated": updated}
+    logger.info("Coin metadata sync: %s", result)
+    return result
@@ -1,3 +1,834 @@
-from django.test import TestCase
+import random
+import threading
+import time
+from decimal import Decimal
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from crypto import cmc_client, history, listings, services, services_cmc, sparklines
+
+from crypto.cache import COIN_LIST_VERSION_KEY, cached_fetch
+from crypto.coin_list import coin_list_version, prerender_coin_list
+from crypto.concurrency import fetch_pages
+from crypto.models import (
+    Category,
+    CoinCandle,
+    CoinDailyVoteStats,
+    CoinMetadata,
+    CoinPricePoint,
+    CoinRating,
+    CoinRatingStats,
+    CoinRefreshRun,
+    CoinSentimentBucket,
+    CoinVote,
+    CoinVoteStats,
+    CryptoCoin,
+    ListingSnapshot,
+)
+from crypto.sentiment import roll_up_sentiment
+from crypto.sync import refresh_top_coins, sync_coin_metadata, sync_coins
+
+User = get_user_model()
+
+
+def make_row(coin_id, rank, price=1.0, category=None, **overrides):
+    row = {
+        "coingecko_id": coin_id,
+        "rank": rank,
+        "name": coin_id.title(),
+        "symbol": coin_id[:3].upper(),
+        "price": price,
+        "percent_change_1h": 0.1,
+        "percent_change_24h": -1.25,
+        "percent_change_7d": 3.5,
+        "market_cap": "1000000",
+        "volume_24h": "50000",
+        "circulating_supply": "21000000",
+        "sparkline_in_7d": [1.0, 1.1, 1.2],
+        "category": category,
+    }
+    row.update(overrides)
+    return row
+
+
+class SyncCoinsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Top")
+
+    def test_inserts_new_coins(self):
+        result = sync_coins(
+            [make_row("bitcoin", 1, 60000, self.category), make_row("ethereum", 2, 3000, self.category)]
+        )
+        self.assertEqual(result, {"inserted": 2, "updated": 0, "unchanged": 0})
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.assertEqual(btc.price, Decimal("60000.00"))
+        self.assertEqual(btc.category, self.category)
+
+    def test_updates_only_changed_rows(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category), make_row("ethereum", 2, 3000, self.category)])
+        result = sync_coins(
+            [make_row("bitcoin", 1, 61000, self.category), make_row("ethereum", 2, 3000, self.category)]
+        )
+        self.assertEqual(result, {"inserted": 0, "updated": 1, "unchanged": 1})
+        self.assertEqual(CryptoCoin.objects.get(coingecko_id="bitcoin").price, Decimal("61000.00"))
+
+    def test_keeps_fields_outside_the_refresh(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        CryptoCoin.objects.filter(coingecko_id="bitcoin").update(promoted=True, trading_view_name="BTCUSD")
+        sync_coins([make_row("bitcoin", 1, 62000, self.category)])
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.assertTrue(btc.promoted)
+        self.assertEqual(btc.trading_view_name, "BTCUSD")
+
+    def test_duplicate_ids_in_batch_are_written_once(self):
+        result = sync_coins([make_row("bitcoin", 1, 60000), make_row("bitcoin", 1, 59000)])
+        self.assertEqual(result["inserted"], 1)
+        self.assertEqual(CryptoCoin.objects.filter(coingecko_id="bitcoin").count(), 1)
+
+    def test_unchanged_rows_keep_last_updated(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        before = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        result = sync_coins([make_row("bitcoin", 1, 60000.001, self.category)])
+        self.assertEqual(result["unchanged"], 1)
+        after = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.assertEqual(after.last_updated, before.last_updated)
+        self.assertEqual(after.content_hash, before.content_hash)
+
+    def test_manual_edit_is_restored_by_next_refresh(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        btc.name = "Edited"
+        btc.save()
+        result = sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(CryptoCoin.objects.get(coingecko_id="bitcoin").name, "Bitcoin")
+
+    def test_sparkline_change_triggers_rewrite(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        result = sync_coins([make_row("bitcoin", 1, 60000, self.category, sparkline_in_7d=[1.0, 1.3])])
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(CryptoCoin.objects.get(coingecko_id="bitcoin").sparkline_in_7d, [1.0, 1.3])
+
+    def test_partial_save_keeps_svg_in_step(self):
+        sync_coins([make_row("bitcoin", 1, 60000, self.category)])
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        btc.sparkline_in_7d = [1.0, 3.0, 2.0]
+        btc.save(update_fields=["sparkline_in_7d"])
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.assertEqual(btc.sparkline_svg, sparklines.svg_path([1.0, 3.0, 2.0]))
+        self.assertEqual(btc.content_hash, "")
+
+
+class FetchPagesTests(SimpleTestCase):
+    def test_results_keep_page_order(self):
+        def fetch(page):
+            time.sleep(random.random() / 100)
+            return [page]
+
+        pages = [page for page, _ in fetch_pages(fetch, range(1, 9), max_workers=4)]
+        self.assertEqual(pages, list(range(1, 9)))
+
+    def test_stops_at_first_empty_page(self):
+        calls = []
+
+        def fetch(page):
+            calls.append(page)
+            return [page] if page < 3 else []
+
+        results = [data for _, data in fetch_pages(fetch, range(1, 50), max_workers=2)]
+        self.assertEqual(results, [[1], [2]])
+        self.assertLess(len(calls), 10)
+
+
+class RefreshTopCoinsTests(TestCase):
+    def setUp(self):
+        self.pages = {
+            1: [make_row("bitcoin", 1), make_row("ethereum", 2)],
+            2: [make_row("tether", 3), make_row("solana", 4)],
+            3: [make_row("cardano", 5)],
+        }
+        self.requested = []
+
+    def iter_pages(self, fail_on=None):
+        def pages(start_page):
+            self.requested.append(start_page)
+            for page in range(start_page, 4):
+                if page == fail_on:
+                    raise RuntimeError("upstream down")
+                yield page, self.pages[page]
+        return pages
+
+    def test_streams_pages_and_completes_run(self):
+        result = refresh_top_coins("test", self.iter_pages(), dict, limit=5)
+        self.assertEqual(result, {"inserted": 5, "updated": 0, "unchanged": 0})
+        run = CoinRefreshRun.objects.get()
+        self.assertEqual((run.status, run.last_page), ("completed", 3))
+
+    def test_interrupted_run_resumes_after_last_committed_page(self):
+        with self.assertRaises(RuntimeError):
+            refresh_top_coins("test", self.iter_pages(fail_on=3), dict, limit=5)
+        self.assertEqual(CryptoCoin.objects.count(), 4)
+        self.assertEqual(CoinRefreshRun.objects.get().status, "failed")
+
+        result = refresh_top_coins("test", self.iter_pages(), dict, limit=5)
+        self.assertEqual(self.requested, [1, 3])
+        self.assertEqual(result["inserted"], 5)
+        self.assertEqual(CoinRefreshRun.objects.get().status, "completed")
+
+    def test_run_in_progress_elsewhere_is_not_resumed(self):
+        busy = CoinRefreshRun.objects.create(source="test", limit=5, vs_currency="usd", last_page=1)
+        refresh_top_coins("test", self.iter_pages(), dict, limit=5)
+        self.assertEqual(self.requested, [1])
+        busy.refresh_from_db()
+        self.assertEqual((busy.status, busy.last_page), ("running", 1))
+
+        # No checkpoint for longer than the heartbeat: the process died
+        CoinRefreshRun.objects.filter(pk=busy.pk).update(updated_at=timezone.now() - timedelta(minutes=10))
+        refresh_top_coins("test", self.iter_pages(), dict, limit=5)
+        self.assertEqual(self.requested, [1, 2])
+        busy.refresh_from_db()
+        self.assertEqual(busy.status, "completed")
+
+
+class CachedFetchTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return {"version": self.calls}
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached_fetch("k", self.fetch, 60)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{"version": 1}] * 8)
+
+    def test_missing_result_is_cached_briefly(self):
+        def fetch():
+            self.calls += 1
+            return None
+
+        self.assertIsNone(cached_fetch("k", fetch, 60))
+        self.assertIsNone(cached_fetch("k", fetch, 60))
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        cached_fetch("k", self.fetch, 0, stale_ttl=60)
+        self.assertEqual(cached_fetch("k", self.fetch, 0, stale_ttl=60), {"version": 1})
+        deadline = time.time() + 2
+        while self.calls < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.calls, 2)
+
+
+class CmcBatchDetailTests(SimpleTestCase):
+    def fake_cmc_get(self, path, params):
+        ids = params["id"].split(",")
+        if path == "/cryptocurrency/info":
+            return {"data": {i: {"id": int(i), "symbol": f"C{i}", "name": f"Coin {i}", "logo": None} for i in ids}}
+        return {
+            "data": {
+                i: {
+                    "id": int(i),
+                    "circulating_supply": 10,
+                    "last_updated": "2025-01-01T00:00:00Z",
+                    "quote": {"USD": {
+                        "price": 1.5, "market_cap": 15, "volume_24h": 3,
+                        "percent_change_1h": 0, "percent_change_24h": 0, "percent_change_7d": 0,
+                    }},
+                }
+                for i in ids if i != "3"
+            }
+        }
+
+    def test_one_call_per_endpoint_for_many_coins(self):
+        with mock.patch.object(services_cmc, "_cmc_get", side_effect=self.fake_cmc_get) as cmc_get:
+            details = services_cmc.fetch_coin_details(["1", "2", "3"])
+        self.assertEqual(cmc_get.call_count, 2)
+        self.assertEqual(sorted(details), ["1", "2"])
+        self.assertEqual(details["1"]["name"], "Coin 1")
+        self.assertEqual(details["2"]["market_data"]["current_price"], {"USD": 1.5})
+
+
+class CoinGeckoBatchDetailTests(SimpleTestCase):
+    def test_failing_coin_does_not_abort_the_batch(self):
+        def info(coin_id):
+            if coin_id == "broken":
+                raise RuntimeError("upstream 500")
+            return {"id": coin_id}
+
+        with mock.patch.object(services, "fetch_coin_info", side_effect=info), mock.patch.object(
+            services, "fetch_coin_market", side_effect=lambda coin_id: {"market_data": {"id": coin_id}}
+        ):
+            details = services.fetch_coin_details(["bitcoin", "broken", "ethereum"])
+        self.assertEqual(sorted(details), ["bitcoin", "ethereum"])
+        self.assertEqual(details["bitcoin"], {"id": "bitcoin", "market_data": {"id": "bitcoin"}})
+
+
+class CmcGetTests(TestCase):
+    def response(self, status_code, payload, headers=None):
+        r = mock.Mock(status_code=status_code, headers=headers or {}, text="")
+        r.json.return_value = payload
+        r.raise_for_status.side_effect = (
+            cmc_client.requests.HTTPError(f"{status_code}") if status_code >= 400 else None
+        )
+        return r
+
+    def test_rate_limited_request_waits_for_retry_after(self):
+        limited = self.response(429, {"status": {"error_code": 1008, "error_message": "minute limit"}}, {"Retry-After": "7"})
+        ok = self.response(200, {"status": {"error_code": 0}, "data": {"ok": True}})
+        with mock.patch.object(cmc_client.SESSION, "get", side_effect=[limited, ok]), \
+                mock.patch.object(cmc_client.time, "sleep") as sleep, \
+                mock.patch.object(cmc_client._BUCKET, "acquire"):
+            self.assertEqual(cmc_client.cmc_get("/v1/x"), {"ok": True})
+        sleep.assert_called_once_with(7.0)
+
+    def test_client_errors_are_not_retried(self):
+        bad = self.response(400, {"status": {"error_code": 400, "error_message": "bad id"}})
+        with mock.patch.object(cmc_client.SESSION, "get", return_value=bad) as get, \
+                mock.patch.object(cmc_client.time, "sleep"), \
+                mock.patch.object(cmc_client._BUCKET, "acquire"):
+            with self.assertRaises(cmc_client.RequestException):
+                cmc_client.cmc_get("/v1/x")
+        self.assertEqual(get.call_count, 1)
+
+    def test_requests_in_flight_are_capped(self):
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def get(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return self.response(200, {"status": {"error_code": 0}, "data": {}})
+
+        with mock.patch.object(cmc_client.SESSION, "get", side_effect=get), \
+                mock.patch.object(cmc_client._BUCKET, "acquire"):
+            threads = [threading.Thread(target=cmc_client.cmc_get, args=("/v1/x",)) for _ in range(3 * cmc_client.CMC_CONCURRENCY)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertLessEqual(peak[0], cmc_client.CMC_CONCURRENCY)
+
+    def test_backoff_is_jittered_without_retry_after(self):
+        delays = {cmc_client._retry_delay(None, 2) for _ in range(20)}
+        self.assertTrue(all(1.0 <= d <= 3.0 for d in delays))
+        self.assertGreater(len(delays), 1)
+
+
+class ListingSnapshotTests(TestCase):
+    def setUp(self):
+        listings._latest.clear()
+        self.addCleanup(listings._latest.clear)
+
+    def fake_cmc_get(self, path, params):
+        start, limit = params["start"], params["limit"]
+        return [
+            {
+                "id": i, "symbol": "USDT" if i == 2 else f"C{i}", "name": f"Coin {i}", "cmc_rank": i,
+                "circulating_supply": 10,
+                "quote": {params["convert"]: {"price": 1, "market_cap": 1000 - i, "percent_change_24h": 0}},
+            }
+            for i in range(start, start + limit)
+        ]
+
+    def test_refresh_pages_become_the_shared_snapshot(self):
+        from marketglobal.services import _fetch_top_list
+
+        with mock.patch.object(listings, "cmc_get", side_effect=self.fake_cmc_get) as cmc_get:
+            coins = services_cmc.fetch_top_coins(limit=300)
+            top = _fetch_top_list(20)
+        # 300 deep at 250/page; the second consumer reads the snapshot
+        self.assertEqual(cmc_get.call_count, 2)
+        self.assertEqual(len(coins), 300)
+        self.assertEqual(len(top), 20)
+        self.assertNotIn("USDT", [c["symbol"] for c in top])
+        self.assertEqual(ListingSnapshot.objects.get().limit, 300)
+
+    def test_pages_are_yielded_before_the_pull_completes(self):
+        with mock.patch.object(listings, "cmc_get", side_effect=self.fake_cmc_get):
+            pages = services_cmc.iter_top_coin_pages(limit=1000)
+            page, coins = next(pages)
+            self.assertEqual((page, len(coins)), (1, 250))
+            self.assertFalse(ListingSnapshot.objects.exists())
+            self.assertEqual([p for p, _ in pages], [2, 3, 4])
+        self.assertEqual(len(ListingSnapshot.objects.get().data), 1000)
+
+    def test_deep_refresh_stores_only_the_listings_limit(self):
+        with mock.patch.object(listings, "cmc_get", side_effect=self.fake_cmc_get), \
+                mock.patch.object(listings, "LISTINGS_LIMIT", 300):
+            pages = list(services_cmc.iter_top_coin_pages(limit=1000))
+        self.assertEqual(sum(len(coins) for _, coins in pages), 1000)
+        snapshot = ListingSnapshot.objects.get()
+        self.assertEqual((snapshot.limit, len(snapshot.data)), (300, 300))
+        self.assertEqual(snapshot.data[-1]["id"], 300)
+
+    def test_resumed_refresh_does_not_store_a_partial_snapshot(self):
+        with mock.patch.object(listings, "cmc_get", side_effect=self.fake_cmc_get) as cmc_get:
+            pages = list(services_cmc.iter_top_coin_pages(limit=1000, start_page=3))
+        self.assertEqual([p for p, _ in pages], [3, 4])
+        self.assertEqual(pages[0][1][0]["rank"], 501)
+        self.assertEqual(cmc_get.call_count, 2)
+        self.assertFalse(ListingSnapshot.objects.exists())
+
+    def test_snapshot_is_reused_from_db_until_stale(self):
+        with mock.patch.object(listings, "cmc_get", side_effect=self.fake_cmc_get) as cmc_get:
+            listings.get_listings(100)
+            listings._latest.clear()
+            self.assertEqual(len(listings.get_listings(100)), 100)
+            self.assertEqual([p for p, _ in listings.iter_listing_pages(600)], [1, 2, 3])
+            self.assertEqual(cmc_get.call_count, 4)
+
+            ListingSnapshot.objects.update(fetched_at=timezone.now() - timedelta(hours=1))
+            listings._latest.clear()
+            listings.get_listings(100)
+            self.assertEqual(cmc_get.call_count, 8)
+
+
+class CoinMetadataTests(TestCase):
+    def setUp(self):
+        sync_coins([make_row("bitcoin", 1), make_row("ethereum", 2)])
+        self.btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+
+    def info(self, coin_id, description="A coin"):
+        return {
+            "id": coin_id,
+            "image": {"large": f"https://img.example/{coin_id}.png"},
+            "description": {"en": description},
+            "links": {"website": [f"https://{coin_id}.org"]},
+        }
+
+    def test_bulk_sync_creates_then_updates(self):
+        fetch = lambda ids: {i: self.info(i) for i in ids}
+        self.assertEqual(sync_coin_metadata(CryptoCoin.objects.all(), fetch), {"created": 2, "updated": 0})
+        fetch = lambda ids: {i: self.info(i, "Updated") for i in ids}
+        self.assertEqual(sync_coin_metadata(CryptoCoin.objects.all(), fetch), {"created": 0, "updated": 2})
+        self.assertEqual(CoinMetadata.objects.get(coin=self.btc).description, "Updated")
+
+    def test_detail_view_reads_static_fields_from_db(self):
+        CoinMetadata.objects.create(coin=self.btc, **CoinMetadata.fields_from_info(self.info("bitcoin")))
+        cache.clear()
+        market = {"market_data": {"current_price": {"usd": 1}}, "last_updated": "2025-01-01T00:00:00Z"}
+        with mock.patch.object(services, "fetch_coin_info") as fetch_info, mock.patch.object(
+            services, "fetch_coin_market", return_value=market
+        ):
+            response = self.client.get(f"/api/crypto_coins/{self.btc.pk}/")
+        self.assertEqual(response.status_code, 200)
+        fetch_info.assert_not_called()
+        self.assertEqual(response.data["image"], {"large": "https://img.example/bitcoin.png"})
+        self.assertEqual(response.data["market_data"], market["market_data"])
+
+
+    @override_settings(CRYPTO_PROVIDER="cmc")
+    def test_detail_view_uses_the_configured_provider(self):
+        # Under CMC the refresh stores the numeric CMC id in coingecko_id
+        sync_coins([make_row("1", 3)])
+        coin = CryptoCoin.objects.get(coingecko_id="1")
+        cache.clear()
+        usd = {"price": 1, "market_cap": 2, "percent_change_1h": 0, "percent_change_24h": 0, "percent_change_7d": 0, "volume_24h": 3}
+
+        def cmc_get(path, params):
+            if path == "/cryptocurrency/info":
+                item = {"id": 1, "symbol": "BTC", "name": "Bitcoin", "logo": "https://img.example/1.png", "urls": {}}
+            else:
+                item = {"id": 1, "quote": {"USD": usd}, "last_updated": "2025-01-01T00:00:00Z"}
+            return {"data": {params["id"]: item}}
+
+        with mock.patch.object(services_cmc, "_cmc_get", side_effect=cmc_get), \
+                mock.patch.object(services, "fetch_coin_info") as gecko_info:
+            response = self.client.get(f"/api/crypto_coins/{coin.pk}/")
+        self.assertEqual(response.status_code, 200)
+        gecko_info.assert_not_called()
+        self.assertEqual(response.data["image"], {"large": "https://img.example/1.png"})
+        self.assertEqual(CoinMetadata.objects.get(coin=coin).image, "https://img.example/1.png")
+
+class CryptoCoinListViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.top = Category.objects.create(name="Top")
+        rows = [make_row(f"coin{i:03d}", i, category=self.top) for i in range(1, 121)]
+        rows.append(make_row("unranked", None, category=self.top))
+        sync_coins(rows)
+
+    def walk(self, **body):
+        ids, cursor = [], None
+        while True:
+            response = self.client.post("/api/crypto_coins/", {**body, "cursor": cursor} if cursor else body)
+            self.assertEqual(response.status_code, 200)
+            coins = response.json()["coins"]
+            ids += [c["coingecko_id"] for c in coins["results"]]
+            cursor = coins["next_cursor"]
+            if not cursor:
+                return ids, coins["count"]
+
+    def test_cursor_walk_matches_rank_order(self):
+        ids, count = self.walk()
+        self.assertEqual(count, 121)
+        self.assertEqual(ids, ["unranked"] + [f"coin{i:03d}" for i in range(1, 121)])
+
+    def test_cursor_page_matches_offset_page(self):
+        first = self.client.post("/api/crypto_coins/", {"page": 1}).json()["coins"]
+        by_cursor = self.client.post("/api/crypto_coins/", {"cursor": first["next_cursor"]}).json()["coins"]
+        by_page = self.client.post("/api/crypto_coins/", {"page": 2}).json()["coins"]
+        self.assertEqual(by_cursor["results"], by_page["results"])
+
+    def test_page_is_cached_until_coins_change(self):
+        self.client.post("/api/crypto_coins/", {})
+        with self.assertNumQueries(0):
+            self.client.post("/api/crypto_coins/", {})
+        sync_coins([make_row("newcoin", 500, category=self.top)])
+        self.assertEqual(self.client.post("/api/crypto_coins/", {}).json()["coins"]["count"], 122)
+
+    def test_prerendered_pages_serve_without_queries(self):
+        self.assertEqual(prerender_coin_list(pages=3), 0)  # locmem: pages would be private
+        with mock.patch("crypto.coin_list.is_shared_cache", return_value=True):
+            prerender_coin_list(pages=3)
+        first = self.client.get("/api/crypto_coins/", {"category": self.top.pk})
+        with self.assertNumQueries(0):
+            second = self.client.get(
+                "/api/crypto_coins/", {"category": self.top.pk, "cursor": first.json()["coins"]["next_cursor"]}
+            )
+        self.assertEqual(second.json()["coins"]["results"][0]["coingecko_id"], "coin050")
+
+    def test_version_follows_db_changes_from_other_processes(self):
+        version = coin_list_version()
+        # Written elsewhere: this process's memo is not invalidated
+        CryptoCoin.objects.filter(coingecko_id="coin001").update(last_updated=timezone.now())
+        self.assertEqual(coin_list_version(), version)
+        cache.delete(COIN_LIST_VERSION_KEY)  # memo expired
+        self.assertNotEqual(coin_list_version(), version)
+
+    def test_version_follows_ratings_and_categories(self):
+        user = User.objects.create_user(username="rater", email="rater@example.com", password="pass12345")
+        coin = CryptoCoin.objects.get(coingecko_id="coin001")
+        versions = [coin_list_version()]
+
+        def changed():
+            cache.delete(COIN_LIST_VERSION_KEY)
+            versions.append(coin_list_version())
+            return versions[-1] != versions[-2]
+
+        rating = CoinRating.objects.create(user=user, coin=coin, stars=4)
+        self.assertTrue(changed())
+        rating.stars = 5
+        rating.save()
+        self.assertTrue(changed())
+        rating.delete()
+        self.assertTrue(changed())
+        Category.objects.filter(pk=self.top.pk).update(name="Majors")
+        self.assertTrue(changed())
+        Category.objects.create(name="DeFi")
+        self.assertTrue(changed())
+
+    def test_etag_changes_on_refresh(self):
+        response = self.client.get("/api/crypto_coins/")
+        etag = response["ETag"]
+        self.assertEqual(self.client.get("/api/crypto_coins/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        sync_coins([make_row("coin001", 1, price=2.0, category=self.top)])
+        response = self.client.get("/api/crypto_coins/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_changes_after_refresh_in_another_process(self):
+        etag = self.client.get("/api/crypto_coins/")["ETag"]
+        CryptoCoin.objects.filter(coingecko_id="coin001").update(price=2, last_updated=timezone.now())
+        cache.delete(COIN_LIST_VERSION_KEY)  # memo expired
+        response = self.client.get("/api/crypto_coins/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["coins"]["results"][1]["price"], "2.00")
+
+    def test_sparkline_is_omitted_unless_requested(self):
+        sync_coins([make_row("coin001", 1, category=self.top, sparkline_in_7d=[float(i) for i in range(168)])])
+        row = self.client.get("/api/crypto_coins/").json()["coins"]["results"][1]
+        self.assertNotIn("sparkline", row)
+        self.assertNotIn("sparkline_in_7d", row)
+        row = self.client.get("/api/crypto_coins/", {"sparkline": "compact"}).json()["coins"]["results"][1]
+        self.assertEqual(len(row["sparkline"]), 24)
+        self.assertEqual((row["sparkline"][0], row["sparkline"][-1]), (0.0, 167.0))
+        self.assertEqual(self.client.get("/api/crypto_coins/", {"sparkline": "x"}).status_code, 400)
+
+    def test_sparkline_paths_in_bulk(self):
+        coins = dict(CryptoCoin.objects.values_list("coingecko_id", "id"))
+        ids = f"{coins['coin001']},{coins['coin002']}"
+        response = self.client.get("/api/coins/sparklines/", {"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["paths"]), {str(coins["coin001"]), str(coins["coin002"])})
+        self.assertTrue(response.data["paths"][str(coins["coin001"])].startswith("M0.0,30.0L"))
+
+    def test_invalid_cursor(self):
+        response = self.client.post("/api/crypto_coins/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SparklineTests(SimpleTestCase):
+    def test_downsample_keeps_endpoints(self):
+        points = [float(i) for i in range(168)]
+        small = sparklines.downsample(points, 24)
+        self.assertEqual(len(small), 24)
+        self.assertEqual((small[0], small[-1]), (0.0, 167.0))
+        self.assertEqual(sparklines.downsample([1.0, 2.0], 24), [1.0, 2.0])
+
+    def test_svg_path_fits_the_box(self):
+        path = sparklines.svg_path([1.0, 3.0, 2.0], width=100, height=30)
+        self.assertEqual(path, "M0.0,30.0L50.0,0.0L100.0,15.0")
+        self.assertEqual(sparklines.svg_path([1.0]), "")
+
+    def test_delta_encoding_round_trips(self):
+        points = [0.000123456, 0.000124001, 0.000122999]
+        encoded = sparklines.delta_encode(points)
+        decoded, total = [], 0
+        for delta in encoded:
+            total += delta
+            decoded.append(total)
+        for a, b in zip(decoded, points):
+            self.assertAlmostEqual(a, b, places=9)
+
+
+class CoinVoteTests(TestCase):
+    def setUp(self):
+        sync_coins([make_row("bitcoin", 1)])
+        self.coin = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.users = [User.objects.create_user(username=f"voter{i}", email=f"voter{i}@example.com", password="pass12345") for i in range(3)]
+
+    def vote(self, user, vote):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f"/api/coins/{self.coin.pk}/vote/", {"vote": vote}, format="json")
+
+    def test_votes_update_counters(self):
+        self.vote(self.users[0], "bullish")
+        self.vote(self.users[1], "bullish")
+        self.vote(self.users[2], "bearish")
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/coins/{self.coin.pk}/vote_stats/")
+        self.assertEqual(response.data, {"bullish": 2, "bearish": 1})
+        daily = CoinDailyVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((daily.bullish, daily.bearish), (2, 1))
+
+    def test_vote_stats_without_votes(self):
+        response = self.client.get(f"/api/coins/{self.coin.pk}/vote_stats/")
+        self.assertEqual(response.data, {"bullish": 0, "bearish": 0})
+        self.assertEqual(self.client.get("/api/coins/999999/vote_stats/").status_code, 404)
+        self.assertEqual(self.client.get("/api/coins/abc/vote_stats/").status_code, 404)
+
+    def test_cascade_and_queryset_deletes_keep_counters(self):
+        for user in self.users:
+            self.vote(user, "bullish")
+        self.users[0].delete()
+        CoinVote.objects.filter(user=self.users[1]).delete()
+        stats = CoinVoteStats.objects.get(coin=self.coin)
+        daily = CoinDailyVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.bullish, daily.bullish), (1, 1))
+        # Already at 0: clamped rather than an IntegrityError
+        CoinVoteStats.objects.update(bullish=0)
+        CoinVote.objects.all().delete()
+        self.assertEqual(CoinVoteStats.objects.get(coin=self.coin).bullish, 0)
+        self.coin.delete()
+        self.assertFalse(CoinVoteStats.objects.exists())
+
+    def test_rebuild_command_reconciles_counters(self):
+        self.vote(self.users[0], "bullish")
+        self.vote(self.users[1], "bearish")
+        CoinVoteStats.objects.update(bullish=40)
+        CoinVote.objects.filter(user=self.users[1]).delete()
+        call_command("rebuild_coin_counters", stdout=StringIO())
+        stats = CoinVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.bullish, stats.bearish), (1, 0))
+
+    def test_second_vote_same_day_is_rejected_without_lookup(self):
+        self.assertEqual(self.vote(self.users[0], "bullish").status_code, 201)
+        response = self.vote(self.users[0], "bearish")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CoinVote.objects.filter(user=self.users[0]).count(), 1)
+        stats = CoinVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.bullish, stats.bearish), (1, 0))
+
+    def test_vote_again_on_a_new_day(self):
+        vote = CoinVote.objects.create(user=self.users[0], coin=self.coin, vote="bullish")
+        CoinVote.objects.filter(pk=vote.pk).update(vote_date=vote.vote_date - timedelta(days=1))
+        self.assertEqual(self.vote(self.users[0], "bearish").status_code, 201)
+
+
+class CoinRatingStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        sync_coins([make_row("bitcoin", 1), make_row("ethereum", 2)])
+        self.coin = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.users = [User.objects.create_user(username=f"rater{i}", email=f"rater{i}@example.com", password="pass12345") for i in range(3)]
+
+    def rate(self, user, stars):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f"/api/coins/{self.coin.pk}/rate/", {"stars": stars}, format="json")
+
+    def test_create_update_and_delete_keep_stats(self):
+        self.rate(self.users[0], 5)
+        self.rate(self.users[1], 3)
+        self.rate(self.users[1], 4)
+        stats = CoinRatingStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.count, stats.total, stats.stars_3, stats.stars_4, stats.stars_5), (2, 9, 0, 1, 1))
+        CoinRating.objects.get(user=self.users[0]).delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.count, stats.total, stats.stars_5), (1, 4, 0))
+
+    def test_rating_stats_reads_one_row(self):
+        self.rate(self.users[0], 5)
+        self.rate(self.users[1], 2)
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        with self.assertNumQueries(2):
+            response = client.get(f"/api/coins/{self.coin.pk}/rating_stats/")
+        self.assertEqual(response.data["average"], 3.5)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(response.data["my_rating"], 2)
+        self.assertEqual(response.data["histogram"]["5"], 1)
+        response = self.client.get(f"/api/coins/{self.coin.pk}/rating_stats/")
+        self.assertIsNone(response.data["my_rating"])
+        self.assertEqual(self.client.get("/api/coins/abc/rating_stats/").status_code, 404)
+
+    def test_cascade_and_queryset_deletes_keep_stats(self):
+        for user, stars in zip(self.users, (5, 4, 4)):
+            self.rate(user, stars)
+        self.users[0].delete()
+        CoinRating.objects.filter(user=self.users[1]).delete()
+        stats = CoinRatingStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.count, stats.total, stats.stars_4, stats.stars_5), (1, 4, 1, 0))
+        # Drifted below the real value: clamped at 0 rather than an IntegrityError
+        CoinRatingStats.objects.update(count=0, total=0)
+        CoinRating.objects.all().delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.count, stats.total, stats.stars_4), (0, 0, 0))
+
+    def test_list_shows_average_rating(self):
+        self.rate(self.users[0], 4)
+        results = self.client.get("/api/crypto_coins/").json()["coins"]["results"]
+        self.assertEqual([r["average_rating"] for r in results], [4.0, 0])
+
+    def test_rebuild_command_reconciles_ratings(self):
+        self.rate(self.users[0], 4)
+        CoinRatingStats.objects.update(count=10, total=3)
+        call_command("rebuild_coin_counters", stdout=StringIO())
+        stats = CoinRatingStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.count, stats.total, stats.stars_4), (1, 4, 1))
+
+
+class SentimentRollupTests(TestCase):
+    def setUp(self):
+        sync_coins([make_row("bitcoin", 1)])
+        self.coin = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        self.users = [User.objects.create_user(username=f"sentiment{i}", email=f"sentiment{i}@example.com", password="pass12345") for i in range(3)]
+
+    def add_vote(self, user, vote, created_at):
+        cv = CoinVote.objects.create(user=user, coin=self.coin, vote=vote)
+        CoinVote.objects.filter(pk=cv.pk).update(created_at=created_at, vote_date=created_at.date())
+        return cv
+
+    def test_rollup_is_incremental(self):
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+        self.add_vote(self.users[0], "bullish", hour + timedelta(minutes=5))
+        self.add_vote(self.users[1], "bearish", hour + timedelta(minutes=10))
+        self.assertEqual(roll_up_sentiment()["votes"], 2)
+        self.add_vote(self.users[2], "bullish", hour + timedelta(minutes=20))
+        self.assertEqual(roll_up_sentiment(batch_size=1)["votes"], 1)
+        self.assertEqual(roll_up_sentiment()["votes"], 0)
+        bucket = CoinSentimentBucket.objects.get(coin=self.coin, bucket="hour")
+        self.assertEqual((bucket.start, bucket.bullish, bucket.bearish), (hour, 2, 1))
+
+    def test_history_endpoint(self):
+        now = timezone.now()
+        self.add_vote(self.users[0], "bullish", now - timedelta(hours=5))
+        self.add_vote(self.users[1], "bearish", now - timedelta(hours=1))
+        roll_up_sentiment()
+        url = f"/api/coins/{self.coin.pk}/sentiment_history/"
+        response = self.client.get(url)
+        self.assertEqual([(r["bullish"], r["bearish"]) for r in response.data["results"]], [(1, 0), (0, 1)])
+        start = (now - timedelta(hours=3)).strftime("%Y-%m-%dT%H:%M:%S")
+        response = self.client.get(url, {"bucket": "hour", "start": start})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(self.client.get(url, {"bucket": "week"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "yesterday"}).status_code, 400)
+
+    def test_compaction_keeps_history_and_counters(self):
+        old = timezone.now() - timedelta(days=120)
+        self.add_vote(self.users[0], "bullish", old)
+        self.add_vote(self.users[1], "bearish", old)
+        self.add_vote(self.users[2], "bullish", timezone.now() - timedelta(hours=2))
+        call_command("rollup_sentiment", "--compact", stdout=StringIO())
+        self.assertEqual(CoinVote.objects.count(), 1)
+        self.assertEqual(CoinSentimentBucket.objects.filter(bucket="day").count(), 2)
+        stats = CoinVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.bullish, stats.bearish), (2, 1))  # compaction does not decrement
+        call_command("rebuild_coin_counters", stdout=StringIO())
+        stats = CoinVoteStats.objects.get(coin=self.coin)
+        self.assertEqual((stats.bullish, stats.bearish), (2, 1))
+        daily = CoinDailyVoteStats.objects.get(coin=self.coin, day=old.date())
+        self.assertEqual((daily.bullish, daily.bearish), (1, 1))
+
+
+class PriceHistoryTests(TestCase):
+    def test_refresh_feeds_points_and_candles(self):
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        with mock.patch("crypto.sync.timezone.now", return_value=hour + timedelta(minutes=1)):
+            sync_coins([make_row("bitcoin", 1, price=100.0), make_row("ethereum", 2, price=10.0)])
+        with mock.patch("crypto.sync.timezone.now", return_value=hour + timedelta(minutes=6)):
+            sync_coins([make_row("bitcoin", 1, price=120.0), make_row("ethereum", 3, price=10.0)])
+        with mock.patch("crypto.sync.timezone.now", return_value=hour + timedelta(minutes=11)):
+            sync_coins([make_row("bitcoin", 1, price=90.0), make_row("ethereum", 2, price=10.0)])
+
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        eth = CryptoCoin.objects.get(coingecko_id="ethereum")
+        self.assertEqual(CoinPricePoint.objects.filter(coin=btc).count(), 3)
+        # A point on every refresh, even when the price did not move
+        self.assertEqual(CoinPricePoint.objects.filter(coin=eth).count(), 3)
+
+        response = self.client.get(f"/api/coins/{btc.pk}/candles/", {"interval": "1h"})
+        self.assertEqual(len(response.data["results"]), 1)
+        candle = response.data["results"][0]
+        self.assertEqual(
+            [candle[k] for k in ("open", "high", "low", "close")],
+            [Decimal("100.00"), Decimal("120.00"), Decimal("90.00"), Decimal("90.00")],
+        )
+        self.assertEqual(CoinCandle.objects.filter(coin=btc, interval="1d").get().close, Decimal("90.00"))
+        self.assertEqual(self.client.get(f"/api/coins/{btc.pk}/candles/", {"interval": "5m"}).status_code, 400)
+
+    def test_sub_cent_prices_keep_full_precision(self):
+        sync_coins([make_row("shiba", 1, price=0.0000123456)])
+        sync_coins([make_row("shiba", 1, price=0.0000125)])
+        coin = CryptoCoin.objects.get(coingecko_id="shiba")
+        self.assertEqual(coin.price, Decimal("0.00"))
+        points = CoinPricePoint.objects.filter(coin=coin).order_by("ts").values_list("price", flat=True)
+        self.assertEqual(list(points), [Decimal("0.000012345600"), Decimal("0.000012500000")])
+        candle = CoinCandle.objects.get(coin=coin, interval="1h")
+        self.assertEqual((candle.open, candle.high), (Decimal("0.000012345600"), Decimal("0.000012500000")))
+
+    def test_refresh_prunes_points_past_retention(self):
+        old = timezone.now() - timedelta(days=history.PRICE_POINT_RETENTION_DAYS + 1)
+        with mock.patch("crypto.sync.timezone.now", return_value=old):
+            sync_coins([make_row("bitcoin", 1, price=100.0)])
+        btc = CryptoCoin.objects.get(coingecko_id="bitcoin")
+        refresh_top_coins("test", lambda start_page: iter([(1, [make_row("bitcoin", 1, price=110.0)])]), lambda row: row)
+        self.assertEqual(list(CoinPricePoint.objects.filter(coin=btc).values_list("price", flat=True)), [Decimal("110")])
+        # The rollup of the pruned point stays
+        candle = CoinCandle.objects.get(coin=btc, interval="1d", start=history.bucket_start(old, "1d"))
+        self.assertEqual(candle.open, Decimal("100"))
@@ -1,23 +1,45 @@
-from django.db import models
+from datetime import timedelta
+
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Category, CoinWishlist, CryptoCoin, MarketStatistics, CoinSecurityCheckRequest
+from .models import CoinMetadata, CoinRating, CoinRatingStats, CoinVoteStats, CoinWishlist, CryptoCoin, MarketStatistics, CoinSecurityCheckRequest
 from .serializers import (
-    CategorySerializer,
     CoinDetailSerializer,
     CoinRatingSerializer,
     CoinVoteSerializer,
     CoinWishlistSerializer,
+    CryptoCoinListSerializer,
     CryptoCoinSerializer,
     MarketStatisticsSerializer,
     CoinSecurityCheckRequestSerializer,
 )
-from .services import fetch_coin_detail, import_coin
-from post.serializers import PostSerializer
+from .cache import get_coin_detail
+from .coin_list import (
+    PAGE_SIZE,
+    InvalidCursor,
+    coin_list_version,
+    get_rendered_page,
+    page_etag,
+    page_token,
+    render_coin_list,
+)
+from .history import get_candles
+from .sentiment import sentiment_history
+from .sparklines import SVG_HEIGHT, SVG_WIDTH
+from .providers import get_provider
+from .services import import_coin
+from post.views import related_posts_response
+
+CACHE_5M = 300
 
 
 class MarketStatisticsView(generics.RetrieveAPIView):
@@ -30,58 +52,78 @@ class MarketStatisticsView(generics.RetrieveAPIView):
 
 class CryptoCoinListView(APIView):
     """
-    POST endpoint:
+    POST endpoint (GET takes the same fields as query params):
     {
         "category": 1,   # optional
-        "page": 1        # optional (default = 1)
+        "cursor": "...", # optional, "next_cursor" of the previous page
+        "page": 1,       # optional (default = 1), ignored when cursor is set
+        "sparkline": ""  # optional: "compact" (24 points), "delta" or "full"
     }
-    """
 
-    PAGE_SIZE = 50
+    Pages are served as rendered JSON bytes from the cache; the ETag is
+    derived from the DB (see ``coin_list_version``) so every worker changes
+    it once the coin list is refreshed.
+    """
 
-    def post(self, request, *args, **kwargs):
-        category_id = request.data.get("category")
-        page = int(request.data.get("page", 1))
+    PAGE_SIZE = PAGE_SIZE
 
-        queryset = CryptoCoin.objects.all().order_by("rank")
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
+    def get(self, request, *args, **kwargs):
+        return self._list(request, request.query_params)
 
-        total_count = queryset.count()
+    def post(self, request, *args, **kwargs):
+        return self._list(request, request.data)
+
+    def _list(self, request, params):
+        category_id = params.get("category") or None
+        cursor = params.get("cursor") or None
+        sparkline = params.get("sparkline") or None
+        if sparkline and sparkline not in CryptoCoinListSerializer.SPARKLINE_MODES:
+            return Response({"detail": "Invalid sparkline mode"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = int(params.get("page", 1))
+        except (TypeError, ValueError):
+            return Response({"detail": "Invalid page"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Pagination by slicing
-        start = (page - 1) * self.PAGE_SIZE
-        end = start + self.PAGE_SIZE
-        coins = queryset[start:end]
+        version = coin_list_version()
+        token = page_token(category_id, cursor, page, sparkline)
+        etag = page_etag(version, token)
+        if request.method == "GET" and etag in request.headers.get("If-None-Match", ""):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-        coins_serializer = CryptoCoinSerializer(coins, many=True)
+        body = get_rendered_page(version, token)
+        if body is None:
+            try:
+                body = render_coin_list(version, category_id, cursor, page, sparkline)
+            except InvalidCursor:
+                return Response({"detail": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
 
-        categories = Category.objects.all()
-        categories_serializer = CategorySerializer(categories, many=True)
-
-        return Response(
-            {
-                "categories": categories_serializer.data,
-                "coins": {
-                    "count": total_count,
-                    "page": page,
-                    "page_size": self.PAGE_SIZE,
-                    "results": coins_serializer.data,
-                },
-            },
-            status=status.HTTP_200_OK,
-        )
+        return HttpResponse(body, content_type="application/json", headers={"ETag": etag})
 
 
 class CoinDetailView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, pk, *args, **kwargs):
-        coin_obj = get_object_or_404(CryptoCoin, pk=pk)
-
-        detail = fetch_coin_detail(coin_obj.coingecko_id)
-        if detail and hasattr(detail, "to_dict"):
-            detail = detail.to_dict()
+        coin_obj = get_object_or_404(CryptoCoin.objects.select_related("metadata"), pk=pk)
+        # coingecko_id holds the id of whichever provider refreshed the coins
+        provider = get_provider()
+
+        def fetch_info(coin_id):
+            # Coins without synced metadata yet: fetch once and keep it
+            info = provider.fetch_coin_info(coin_id)
+            if info:
+                CoinMetadata.objects.update_or_create(
+                    coin=coin_obj, defaults=CoinMetadata.fields_from_info(info)
+                )
+            return info
+
+        metadata = getattr(coin_obj, "metadata", None)
+        detail = get_coin_detail(
+            coin_obj.coingecko_id,
+            fetch_info,
+            provider.fetch_coin_market,
+            info=metadata.as_info() if metadata else None,
+        )
 
         if not detail:
             return Response(
@@ -133,10 +175,65 @@ class CoinImportView(APIView):
         )
 
 
+def _parse_range(request):
+    """Optional ISO 8601 ``start``/``end`` query params; returns ``(bounds, error_response)``."""
+    bounds = {}
+    for name in ("start", "end"):
+        value = request.query_params.get(name)
+        if not value:
+            continue
+        try:
+            bounds[name] = parse_datetime(value)
+        except ValueError:
+            bounds[name] = None
+        if bounds[name] is None:
+            return None, Response(
+                {"detail": f"{name} must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(bounds[name]):
+            bounds[name] = timezone.make_aware(bounds[name])
+    return bounds, None
+
+
+def _coin_pk(pk) -> int:
+    """URL ``pk`` as an int, 404 for anything else (like ``get_object()`` would)."""
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        raise Http404
+
+
 class CryptoCoinViewSet(viewsets.ModelViewSet):
     queryset = CryptoCoin.objects.all()
     serializer_class = CryptoCoinSerializer
 
+    SPARKLINE_BATCH_LIMIT = 250
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    @method_decorator(cache_page(CACHE_5M))
+    def sparklines(self, request):
+        """
+        Pre-rendered SVG sparkline paths for a page of coins.
+        GET /coins/sparklines/?ids=1,2,3
+        """
+        try:
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i]
+        except ValueError:
+            return Response({"detail": "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.SPARKLINE_BATCH_LIMIT:
+            return Response(
+                {"detail": f"At most {self.SPARKLINE_BATCH_LIMIT} ids per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        paths = CryptoCoin.objects.filter(id__in=ids).values_list("id", "sparkline_svg")
+        return Response(
+            {
+                "width": SVG_WIDTH,
+                "height": SVG_HEIGHT,
+                "paths": {str(pk): path for pk, path in paths},
+            }
+        )
+
     @action(
         detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
     )
@@ -152,10 +249,54 @@ class CryptoCoinViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
     def vote_stats(self, request, pk=None):
+        stats = CoinVoteStats.objects.filter(coin_id=_coin_pk(pk)).values("bullish", "bearish").first()
+        if stats is None:
+            # No votes yet (or unknown coin -> 404)
+            self.get_object()
+            stats = {"bullish": 0, "bearish": 0}
+        return Response(stats)
+
+    SENTIMENT_DEFAULT_RANGE = {"hour": timedelta(days=2), "day": timedelta(days=90)}
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    def sentiment_history(self, request, pk=None):
+        """
+        Bullish/bearish totals over time from the rollup table.
+        GET /coins/{id}/sentiment_history/?bucket=hour|day&start=<iso>&end=<iso>
+        """
+        bucket = request.query_params.get("bucket", "hour")
+        if bucket not in self.SENTIMENT_DEFAULT_RANGE:
+            return Response({"detail": "bucket must be 'hour' or 'day'"}, status=status.HTTP_400_BAD_REQUEST)
+        bounds, error = _parse_range(request)
+        if error:
+            return error
+        coin = self.get_object()
+        end = bounds.get("end") or timezone.now()
+        start = bounds.get("start") or end - self.SENTIMENT_DEFAULT_RANGE[bucket]
+        return Response(
+            {"bucket": bucket, "results": sentiment_history(coin.pk, bucket, start, end)}
+        )
+
+    CANDLE_DEFAULT_RANGE = {"1h": timedelta(days=7), "1d": timedelta(days=365)}
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    def candles(self, request, pk=None):
+        """
+        OHLC candles from the local price history; no upstream calls.
+        GET /coins/{id}/candles/?interval=1h|1d&start=<iso>&end=<iso>
+        """
+        interval = request.query_params.get("interval", "1h")
+        if interval not in self.CANDLE_DEFAULT_RANGE:
+            return Response({"detail": "interval must be '1h' or '1d'"}, status=status.HTTP_400_BAD_REQUEST)
+        bounds, error = _parse_range(request)
+        if error:
+            return error
         coin = self.get_object()
-        bullish_count = coin.votes.filter(vote="bullish").count()
-        bearish_count = coin.votes.filter(vote="bearish").count()
-        return Response({"bullish": bullish_count, "bearish": bearish_count})
+        end = bounds.get("end") or timezone.now()
+        start = bounds.get("start") or end - self.CANDLE_DEFAULT_RANGE[interval]
+        return Response(
+            {"interval": interval, "results": get_candles(coin.pk, interval, start, end)}
+        )
 
     @action(
         detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
@@ -185,23 +326,32 @@ class CryptoCoinViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
     def rating_stats(self, request, pk=None):
-        coin = self.get_object()
-        ratings = coin.ratings.all()
-        count = ratings.count()
-        avg = ratings.aggregate(models.Avg("stars"))["stars__avg"] or 0
-        try:
-            my_rating = coin.ratings.get(user=request.user)
-        except Exception:
-            my_rating = None
-        return Response({"average": round(avg, 2), "count": count, "my_rating": my_rating})
-
+        pk = _coin_pk(pk)
+        stats = CoinRatingStats.objects.filter(coin_id=pk).first()
+        if stats is None:
+            # No ratings yet (or unknown coin -> 404)
+            self.get_object()
+            stats = CoinRatingStats()
+        my_rating = None
+        if request.user.is_authenticated and stats.count:
+            my_rating = (
+                CoinRating.objects.filter(coin_id=pk, user=request.user)
+                .values_list("stars", flat=True)
+                .first()
+            )
+        return Response(
+            {
+                "average": stats.average,
+                "count": stats.count,
+                "histogram": stats.histogram,
+                "my_rating": my_rating,
+            }
+        )
 
     @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
     def related_posts(self, request, pk=None):
         coin = self.get_object()
-        posts = coin.posts.all().order_by("-publish_at")
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return related_posts_response(request, coin.pk)
 
 
 class UserWishListViewSet(viewsets.ModelViewSet):
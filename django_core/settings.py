@@ -187,6 +187,46 @@ PAYMENT_MIN_CONFIRMATIONS = 3
 
 CMC_PRO_API_KEY = "96c773ee-7fee-4de3-a667-b29c4ef6633b"
 CMC_API_BASE = "https://pro-api.coinmarketcap.com"
+# Shared CMC client (crypto.cmc_client): rate limit (plan's per-minute quota) and max requests in flight
+CMC_REQUESTS_PER_MINUTE = 30
+CMC_CONCURRENCY = 4
 MARKETGLOBAL_STABLE_TICKERS = {
     "USDT","USDC","DAI","TUSD","FDUSD","USDe","PYUSD","USDD","GUSD","LUSD","FRAX","USDP"
 }
+
+# Top-coins refresh: provider ("coingecko" or "cmc"), parallel page fetches throttled to the upstream plan
+CRYPTO_PROVIDER = "coingecko"
+CRYPTO_FETCH_CONCURRENCY = 4
+CRYPTO_FETCH_REQUESTS_PER_MINUTE = 30
+CRYPTO_REFRESH_RESUME_WINDOW = 15 * 60  # seconds an interrupted refresh stays resumable
+CRYPTO_REFRESH_HEARTBEAT = 5 * 60  # a "running" refresh without a checkpoint this long is presumed dead
+
+# Shared CMC listings snapshot (coin refresh, CMC20, altseason/RSI baskets)
+CRYPTO_LISTINGS_MAX_AGE = 5 * 60  # seconds a snapshot is reused by every consumer
+CRYPTO_LISTINGS_LIMIT = 1000  # minimum depth of each pull
+CRYPTO_LISTINGS_KEEP = 24  # snapshots kept per currency
+
+# Coin detail cache (seconds): static info, live market data, stale grace
+CRYPTO_DETAIL_INFO_TTL = 24 * 60 * 60
+CRYPTO_DETAIL_MARKET_TTL = 60
+CRYPTO_DETAIL_STALE_TTL = 10 * 60
+CRYPTO_DETAIL_MISS_TTL = 60  # unknown coins: cache the empty answer this long
+CRYPTO_METADATA_MAX_AGE_DAYS = 7  # re-sync CoinMetadata older than this
+CRYPTO_LIST_PRERENDER_PAGES = 5  # coin list pages per category rendered after each refresh
+CRYPTO_LIST_CACHE_TTL = 60 * 60
+CRYPTO_LIST_VERSION_TTL = 5  # seconds a process reuses the DB-derived coin-list version
+
+# Sentiment rollups of coin votes
+CRYPTO_SENTIMENT_ROLLUP_LAG = 60  # seconds; newer votes wait for the next rollup
+CRYPTO_VOTE_RETENTION_DAYS = 90  # raw votes older than this may be compacted
+
+# Raw CoinPricePoint rows older than this are pruned after each refresh (1h/1d candles are kept)
+CRYPTO_PRICE_POINT_RETENTION_DAYS = 7
+
+MARKETGLOBAL_OHLC_REFETCH_DAYS = 2  # trailing daily candles re-read to pick up late or corrected data
+# Cap-weighted indices computed from CryptoCoin after each refresh: {key: {"size": N}}
+MARKETGLOBAL_INDICES = {"cmc20": {"size": 20}}
+MARKETGLOBAL_COLLECTOR_INTERVALS = {}  # per-box overrides (seconds), e.g. {"fear_greed": 1800}
+# Collector locks live in the default cache: it must be shared (e.g. Redis) for them to hold across processes.
+MARKETGLOBAL_COLLECTOR_LOCK_TIMEOUTS = {}  # per lock group: longest expected run (seconds), e.g. {"heavy": 3600}
+CRYPTO_REFRESH_INTERVAL = 10 * 60  # seconds between top-coins refreshes in run_collectors
@@ -5,6 +5,7 @@ from .models import (
     FearGreedReading,
     AltseasonReading,
     AverageRsiReading,
+    DailyCandle,
 )
 
 @admin.register(MarketSnapshot)
@@ -49,9 +50,10 @@ class MarketSnapshotAdmin(admin.ModelAdmin):
 @admin.register(Top20IndexPoint)
 class Top20IndexPointAdmin(admin.ModelAdmin):
     date_hierarchy = "ts"
-    list_display = ("ts", "index_value", "pct_change_24h")
+    list_display = ("ts", "index_key", "index_value", "pct_change_24h")
+    list_filter = ("index_key",)
     ordering = ("-ts",)
-    readonly_fields = ("ts", "index_value", "pct_change_24h")
+    readonly_fields = ("ts", "index_key", "index_value", "pct_change_24h")
 
 
 @admin.register(FearGreedReading)
@@ -78,3 +80,11 @@ class AverageRsiReadingAdmin(admin.ModelAdmin):
     list_display = ("ts", "avg_rsi")
     ordering = ("-ts",)
     readonly_fields = ("ts", "avg_rsi")
+
+
+@admin.register(DailyCandle)
+class DailyCandleAdmin(admin.ModelAdmin):
+    date_hierarchy = "date"
+    list_display = ("coin_id", "date", "open", "high", "low", "close", "volume")
+    search_fields = ("coin_id",)
+    ordering = ("coin_id", "-date")
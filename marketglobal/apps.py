@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MarketglobalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'marketglobal'
+
+    def ready(self):
+        from crypto.sync import coins_refreshed
+        from .indices import record_indices
+
+        coins_refreshed.connect(record_indices, dispatch_uid="marketglobal.record_indices")
@@ -0,0 +1,197 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from . import services
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runs of each box; override per box with MARKETGLOBAL_COLLECTOR_INTERVALS
+INTERVALS = {
+    "market_snapshot": 5 * 60,
+    "fear_greed": 60 * 60,
+    "altseason": 24 * 60 * 60,
+    "average_rsi": 24 * 60 * 60,
+    **getattr(settings, "MARKETGLOBAL_COLLECTOR_INTERVALS", {}),
+}
+
+# Longest expected run per lock group (seconds); a crashed holder's lock
+# expires after this. Override with MARKETGLOBAL_COLLECTOR_LOCK_TIMEOUTS.
+DEFAULT_LOCK_TIMEOUT = 5 * 60
+LOCK_TIMEOUTS = {
+    "heavy": 30 * 60,
+    **getattr(settings, "MARKETGLOBAL_COLLECTOR_LOCK_TIMEOUTS", {}),
+}
+
+# Returned instead of a result when the lock group is busy elsewhere
+SKIPPED = object()
+
+
+class Collector:
+    """
+    One dashboard box. ``fetch()`` does the upstream work outside any
+    transaction; ``persist(payload)`` writes it in a short one of its own
+    (jobs that manage their own transactions pass ``persist=None``).
+    Collectors sharing a ``lock`` never run at the same time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Any],
+        persist: Optional[Callable[[Any], Any]],
+        interval: Optional[float] = None,
+        lock: Optional[str] = None,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.persist = persist
+        self.interval = interval if interval is not None else INTERVALS[name]
+        self.lock = lock or name
+
+    def __repr__(self):
+        return f"<Collector {self.name} every {self.interval}s>"
+
+    def run(self) -> Any:
+        payload = self.fetch()
+        if self.persist is None:
+            return payload
+        with transaction.atomic():
+            return self.persist(payload)
+
+
+LIGHT = ["market_snapshot", "fear_greed"]
+HEAVY = ["altseason", "average_rsi"]
+
+COLLECTORS = {
+    c.name: c
+    for c in [
+        Collector("market_snapshot", services.fetch_global_metrics, services.persist_global_metrics),
+        Collector("fear_greed", services.fetch_fear_greed_latest, services.persist_fear_greed),
+        # The heavy boxes share daily candles; run them one after the other
+        Collector("altseason", services.compute_altseason, services.persist_altseason, lock="heavy"),
+        Collector("average_rsi", services.compute_avg_rsi, services.persist_avg_rsi, lock="heavy"),
+    ]
+}
+
+
+def get_collectors(names: Optional[Iterable[str]] = None) -> List[Collector]:
+    return [COLLECTORS[name] for name in (names or COLLECTORS)]
+
+
+def _run_safely(collector: Collector) -> Any:
+    try:
+        return collector.run()
+    except Exception as e:
+        logger.exception("Collector %s failed", collector.name)
+        return e
+    finally:
+        close_old_connections()
+
+
+def _run_exclusive(collector: Collector) -> Any:
+    """
+    ``_run_safely`` under a cache lock on the collector's group, so two
+    schedulers or an overlapping cron run never run the same group at once.
+    Only a shared cache backend makes this hold across processes.
+    """
+    key = f"marketglobal:collector:lock:{collector.lock}"
+    if not cache.add(key, 1, LOCK_TIMEOUTS.get(collector.lock, DEFAULT_LOCK_TIMEOUT)):
+        logger.info("Collector %s skipped: %s is running elsewhere", collector.name, collector.lock)
+        return SKIPPED
+    try:
+        return _run_safely(collector)
+    finally:
+        cache.delete(key)
+
+
+def run_once(collectors: Iterable[Collector], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run ``collectors`` once, concurrently except within a lock group.
+    Returns ``{name: persisted object, the exception it raised, or SKIPPED}``.
+    """
+    groups: Dict[str, List[Collector]] = {}
+    for collector in collectors:
+        groups.setdefault(collector.lock, []).append(collector)
+    if not groups:
+        return {}
+
+    def run_group(group: List[Collector]) -> Dict[str, Any]:
+        return {collector.name: _run_exclusive(collector) for collector in group}
+
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(groups)) as executor:
+        for result in executor.map(run_group, groups.values()):
+            results.update(result)
+    return results
+
+
+class Scheduler:
+    """
+    Runs collectors on their intervals on a thread pool. A collector whose
+    lock group is still busy (here, or in another process when the cache
+    is shared) waits for the next tick instead of piling up. Each next run
+    is pushed by up to ``jitter`` x interval either way so boxes drift
+    apart.
+    """
+
+    def __init__(
+        self,
+        collectors: Iterable[Collector],
+        max_workers: Optional[int] = None,
+        jitter: float = 0.0,
+    ):
+        self.collectors = list(collectors)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(len(self.collectors), 1))
+        self.jitter = jitter
+        self.next_run = {c.name: 0.0 for c in self.collectors}
+        self.running: Dict[str, Future] = {}
+
+    def run_pending(self, now: Optional[float] = None) -> List[Collector]:
+        """Start every due collector whose lock is free; returns the ones started."""
+        now = time.monotonic() if now is None else now
+        started = []
+        for collector in self.collectors:
+            if self.next_run[collector.name] > now:
+                continue
+            busy = self.running.get(collector.lock)
+            if busy is not None and not busy.done():
+                continue
+            self.running[collector.lock] = self.executor.submit(_run_exclusive, collector)
+            spread = collector.interval * self.jitter
+            self.next_run[collector.name] = now + collector.interval + random.uniform(-spread, spread)
+            started.append(collector)
+        return started
+
+    def run_forever(self, stop: threading.Event, tick: float = 1.0) -> None:
+        while not stop.is_set():
+            self.run_pending()
+            stop.wait(tick)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def update_dashboard(compute_heavy: bool = False) -> Dict[str, Any]:
+    """
+    One pass over the light boxes (plus the heavy ones when asked). Each box
+    commits on its own, so a failing box is reported as ``<name>_error``
+    without affecting the others, and one already running elsewhere as
+    ``<name>_skipped``.
+    """
+    out: Dict[str, Any] = {}
+    for name, result in run_once(get_collectors(LIGHT + (HEAVY if compute_heavy else []))).items():
+        if result is SKIPPED:
+            out[f"{name}_skipped"] = True
+        elif isinstance(result, Exception):
+            out[f"{name}_error"] = str(result)
+        else:
+            out[name] = result
+    return out
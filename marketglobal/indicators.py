@@ -0,0 +1,127 @@
+"""
+Basket indicators (Wilder RSI, period return) over daily closes.
+
+Every coin of a basket is computed at once with numpy (a Pipfile
+dependency) on a coins x days float array; coins are grouped by history
+length so each one sees exactly the window the scalar version would. The
+Decimal implementations below are the reference the vectorized ones are
+tested against, and the fallback where numpy cannot be imported.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Decimal fallback below
+    np = None
+
+RSI_PERIOD = 14
+
+
+# --------- Scalar (Decimal) versions ---------
+
+def pct_change_decimal(closes: Sequence[Decimal]) -> Decimal:
+    if not closes:
+        return Decimal(0)
+    p0, pn = closes[0], closes[-1]
+    return ((pn - p0) / p0) * Decimal(100) if p0 else Decimal(0)
+
+
+def wilder_averages_decimal(
+    closes: Sequence[Decimal], period: int = RSI_PERIOD
+) -> Optional[Tuple[Decimal, Decimal]]:
+    """Wilder ``(avg_gain, avg_loss)`` after the last close, or None if the history is too short."""
+    if len(closes) < period + 1:
+        return None
+    gains, losses = [], []
+    for i in range(1, len(closes)):
+        d = closes[i] - closes[i - 1]
+        gains.append(max(d, Decimal(0)))
+        losses.append(max(-d, Decimal(0)))
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    for i in range(period, len(gains)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+    return avg_gain, avg_loss
+
+
+def advance_wilder(
+    avg_gain: Decimal, avg_loss: Decimal, closes: Sequence[Decimal], period: int = RSI_PERIOD
+) -> Tuple[Decimal, Decimal]:
+    """Fold ``closes[1:]`` into existing averages; ``closes[0]`` is the last close already included."""
+    for prev, cur in zip(closes, closes[1:]):
+        d = cur - prev
+        avg_gain = (avg_gain * (period - 1) + max(d, Decimal(0))) / period
+        avg_loss = (avg_loss * (period - 1) + max(-d, Decimal(0))) / period
+    return avg_gain, avg_loss
+
+
+def rsi_from_averages(avg_gain: Decimal, avg_loss: Decimal) -> Decimal:
+    if avg_loss == 0:
+        return Decimal(100)
+    rs = avg_gain / avg_loss
+    return Decimal(100) - (Decimal(100) / (Decimal(1) + rs))
+
+
+def rsi_decimal(closes: Sequence[Decimal], period: int = RSI_PERIOD) -> Decimal:
+    averages = wilder_averages_decimal(closes, period)
+    return rsi_from_averages(*averages) if averages else Decimal(50)
+
+
+# --------- Vectorized versions ---------
+
+def _by_length(series: Sequence[Sequence]) -> Dict[int, List[int]]:
+    groups: Dict[int, List[int]] = {}
+    for i, closes in enumerate(series):
+        groups.setdefault(len(closes), []).append(i)
+    return groups
+
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(repr(float(value)))
+
+
+def _wilder_averages(closes, period: int):
+    deltas = np.diff(closes, axis=1)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+    avg_gain = gains[:, :period].mean(axis=1)
+    avg_loss = losses[:, :period].mean(axis=1)
+    for i in range(period, deltas.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, i]) / period
+    return avg_gain, avg_loss
+
+
+def basket_wilder(
+    series: Sequence[Sequence[Decimal]], period: int = RSI_PERIOD
+) -> List[Optional[Tuple[Decimal, Decimal]]]:
+    """Wilder ``(avg_gain, avg_loss)`` per coin of ``series``; None where the history is too short."""
+    if np is None:
+        return [wilder_averages_decimal(closes, period) for closes in series]
+    out: List[Optional[Tuple[Decimal, Decimal]]] = [None] * len(series)
+    for length, idx in _by_length(series).items():
+        if length < period + 1:
+            continue
+        avg_gain, avg_loss = _wilder_averages(np.array([series[i] for i in idx], dtype=float), period)
+        for i, gain, loss in zip(idx, avg_gain, avg_loss):
+            out[i] = (_to_decimal(gain), _to_decimal(loss))
+    return out
+
+
+def basket_pct_change(series: Sequence[Sequence[Decimal]]) -> List[Decimal]:
+    """Percent change from first to last close per coin of ``series``."""
+    if np is None:
+        return [pct_change_decimal(closes) for closes in series]
+    out = [Decimal(0)] * len(series)
+    idx = [i for i, closes in enumerate(series) if closes]
+    if not idx:
+        return out
+    matrix = np.array([[series[i][0], series[i][-1]] for i in idx], dtype=float)
+    first, last = matrix[:, 0], matrix[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(first != 0, (last - first) / first * 100.0, 0.0)
+    for i, value in zip(idx, pct):
+        out[i] = _to_decimal(value)
+    return out
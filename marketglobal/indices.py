@@ -0,0 +1,73 @@
+"""
+Cap-weighted indices (CMC20 and friends) computed from the local
+``CryptoCoin`` table: one query per index, no upstream call. A point is
+recorded after every top-coins refresh (``coins_refreshed``), so the
+series moves only when the coin data does.
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from crypto.models import CryptoCoin
+from .models import Top20IndexPoint
+
+logger = logging.getLogger(__name__)
+
+STABLE_TICKERS = {t.upper() for t in getattr(settings, "MARKETGLOBAL_STABLE_TICKERS", set())}
+
+# {key: {"size": N}}; "cmc20" feeds the CMC20 box. There is no category
+# option: the top-coins refresh files every coin under "Top".
+INDICES = getattr(settings, "MARKETGLOBAL_INDICES", {"cmc20": {"size": 20}})
+
+
+def _decimal(value) -> Decimal:
+    try:
+        return Decimal(str(value or 0))
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def index_constituents(size: int = 20) -> list:
+    """Top ``size`` non-stable coins by rank."""
+    queryset = CryptoCoin.objects.filter(rank__isnull=False).exclude(symbol__in=STABLE_TICKERS)
+    return list(queryset.order_by("rank").values("symbol", "market_cap", "percent_change_24h")[:size])
+
+
+def compute_index(size: int = 20) -> Dict:
+    """
+    Today's total cap of the constituents against yesterday's (each cap
+    backed out of its 24h change), with yesterday = 100.
+    """
+    level_now, level_yday = Decimal(0), Decimal(0)
+    for coin in index_constituents(size):
+        mcap = _decimal(coin["market_cap"])
+        denom = (Decimal(1) + _decimal(coin["percent_change_24h"]) / Decimal(100)) or Decimal(1)
+        level_now += mcap
+        level_yday += mcap / denom
+    if level_yday == 0:
+        idx = Decimal(100)
+    else:
+        idx = (level_now / level_yday) * Decimal(100)
+    return {"index_value": idx.quantize(Decimal("0.01")), "pct_change_24h": (idx - Decimal(100)).quantize(Decimal("0.01"))}
+
+
+def compute_indices(keys: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    return {key: compute_index(**INDICES[key]) for key in (keys or INDICES)}
+
+
+def persist_indices(points: Dict[str, Dict]) -> Dict[str, Top20IndexPoint]:
+    return {
+        key: Top20IndexPoint.objects.create(index_key=key, **point)
+        for key, point in points.items()
+    }
+
+
+def record_indices(sender=None, **kwargs) -> Dict[str, Top20IndexPoint]:
+    """``coins_refreshed`` receiver: one point per configured index."""
+    with transaction.atomic():
+        points = persist_indices(compute_indices())
+    logger.info("Recorded index points: %s", {k: p.index_value for k, p in points.items()})
+    return points
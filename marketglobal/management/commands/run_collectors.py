@@ -0,0 +1,57 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from crypto.cache import is_shared_cache
+from crypto.providers import PROVIDERS, get_provider
+from marketglobal.collectors import Collector, Scheduler, get_collectors
+
+
+class Command(BaseCommand):
+    help = "Resident scheduler: runs the coin refresh and market box collectors on their intervals"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these collectors")
+        parser.add_argument("--no-crypto", action="store_true", help="Skip the top-coins refresh")
+        parser.add_argument(
+            "--provider", choices=sorted(PROVIDERS), help="Top-coins provider (default: CRYPTO_PROVIDER)"
+        )
+        parser.add_argument("--jitter", type=float, default=0.1, help="Random spread of each interval (fraction)")
+        parser.add_argument("--tick", type=float, default=1.0, help="Seconds between schedule checks")
+
+    def handle(self, *args, **opts):
+        collectors = get_collectors()
+        if not opts["no_crypto"]:
+            collectors.append(Collector(
+                "crypto_top_coins",
+                get_provider(opts["provider"]).update_top_coins,
+                None,  # refresh_top_coins commits page by page itself
+                interval=getattr(settings, "CRYPTO_REFRESH_INTERVAL", 10 * 60),
+            ))
+        if opts["only"]:
+            collectors = [c for c in collectors if c.name in opts["only"]]
+
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write(f"Received signal {signum}, finishing running collectors...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        if not is_shared_cache():
+            self.stderr.write(self.style.WARNING(
+                "The default cache is process-local: collector locks will not stop other "
+                "schedulers or cron runs. Configure a shared cache (e.g. Redis) in production."
+            ))
+
+        scheduler = Scheduler(collectors, jitter=opts["jitter"])
+        self.stdout.write(self.style.SUCCESS(f"Running {', '.join(c.name for c in collectors)}"))
+        try:
+            scheduler.run_forever(stop, tick=opts["tick"])
+        finally:
+            scheduler.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS("Collectors stopped"))
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from marketglobal.services import update_dashboard
+from marketglobal.collectors import update_dashboard
 
 class Command(BaseCommand):
     help = "Fetch market boxes (light or heavy)"
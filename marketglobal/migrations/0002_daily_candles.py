@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:19
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketglobal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCandleCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin_id', models.IntegerField(unique=True)),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin_id', models.IntegerField()),
+                ('date', models.DateField()),
+                ('open', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('high', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('low', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('close', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('volume', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=40)),
+            ],
+            options={
+                'ordering': ['coin_id', 'date'],
+                'unique_together': {('coin_id', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketglobal', '0002_daily_candles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RsiState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin_id', models.IntegerField()),
+                ('period', models.PositiveSmallIntegerField(default=14)),
+                ('as_of', models.DateField()),
+                ('last_close', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('avg_gain', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('avg_loss', models.DecimalField(decimal_places=18, max_digits=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('coin_id', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketglobal', '0003_rsistate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='top20indexpoint',
+            name='index_key',
+            field=models.CharField(db_index=True, default='cmc20', max_length=32),
+        ),
+    ]
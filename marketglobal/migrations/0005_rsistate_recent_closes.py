@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketglobal', '0004_top20indexpoint_index_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rsistate',
+            name='recent_closes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
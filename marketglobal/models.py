@@ -24,8 +24,9 @@ class MarketSnapshot(models.Model):
 
 
 class Top20IndexPoint(models.Model):
-    """Cap-weighted “CMC20” we compute (for sparkline)."""
+    """Cap-weighted “CMC20” we compute (for sparkline); other configured indices share the table."""
     ts = models.DateTimeField(auto_now_add=True, db_index=True)
+    index_key = models.CharField(max_length=32, default="cmc20", db_index=True)
     index_value = models.DecimalField(max_digits=18, decimal_places=4)
     pct_change_24h = models.DecimalField(max_digits=8, decimal_places=4)
 
@@ -62,3 +63,42 @@ class AverageRsiReading(models.Model):
 
     class Meta:
         ordering = ["-ts"]
+
+
+class DailyCandle(models.Model):
+    """Closed daily OHLCV candle of a CMC coin (cache for the heavy metrics)."""
+    coin_id = models.IntegerField()  # CMC id
+    date = models.DateField()
+    open = models.DecimalField(max_digits=40, decimal_places=18)
+    high = models.DecimalField(max_digits=40, decimal_places=18)
+    low = models.DecimalField(max_digits=40, decimal_places=18)
+    close = models.DecimalField(max_digits=40, decimal_places=18)
+    volume = models.DecimalField(max_digits=40, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        ordering = ["coin_id", "date"]
+        unique_together = ("coin_id", "date")
+
+
+class DailyCandleCoverage(models.Model):
+    """Date range already fetched per coin, so days CMC has no candle for are not asked again."""
+    coin_id = models.IntegerField(unique=True)  # CMC id
+    first_date = models.DateField()
+    last_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RsiState(models.Model):
+    """Wilder RSI running averages per CMC coin, advanced one closed daily candle at a time."""
+    coin_id = models.IntegerField()  # CMC id
+    period = models.PositiveSmallIntegerField(default=14)
+    as_of = models.DateField()  # last candle folded into the averages
+    last_close = models.DecimalField(max_digits=40, decimal_places=18)
+    # Closes of the trailing days up to as_of (the re-fetched window), oldest first
+    recent_closes = models.JSONField(default=list, blank=True)
+    avg_gain = models.DecimalField(max_digits=40, decimal_places=18)
+    avg_loss = models.DecimalField(max_digits=40, decimal_places=18)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("coin_id", "period")
@@ -1,66 +1,37 @@
-import time
 import json
 import logging
-from requests import RequestException
 import datetime as dt
 from decimal import Decimal, getcontext
 from typing import Dict, List, Tuple
 
-import requests
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
 
+from crypto.cmc_client import CMC_CONCURRENCY, cmc_get as _cmc_get
+from crypto.concurrency import fetch_pages
+from crypto.listings import get_listings
+from . import indicators
 from .models import (
     MarketSnapshot,
-    Top20IndexPoint,
     FearGreedReading,
     AltseasonReading,
     AverageRsiReading,
+    DailyCandle,
+    DailyCandleCoverage,
+    RsiState,
 )
 
 getcontext().prec = 28
 
-CMC_BASE = getattr(settings, "CMC_API_BASE", "https://pro-api.coinmarketcap.com")
-HEADERS = {"Accepts": "application/json", "X-CMC_PRO_API_KEY": settings.CMC_PRO_API_KEY}
 STABLE_TICKERS = set(getattr(settings, "MARKETGLOBAL_STABLE_TICKERS", set()))
+# Trailing stored days re-read on each daily fetch (late or corrected candles)
+OHLC_REFETCH_DAYS = getattr(settings, "MARKETGLOBAL_OHLC_REFETCH_DAYS", 2)
 
 logger = logging.getLogger(__name__)
 
 
-def _cmc_get(path: str, params: Dict = None) -> Dict:
-    backoffs = [0, 0.5, 1.0, 2.0]
-    last = None
-    for s in backoffs:
-        if s:
-            time.sleep(s)
-        try:
-            r = requests.get(f"{CMC_BASE}{path}", headers=HEADERS, params=params or {}, timeout=25)
-            try:
-                payload = r.json()
-            except Exception:
-                r.raise_for_status()
-                raise
-            status = payload.get("status", {})
-            raw_code = status.get("error_code", 0)
-            try:
-                err_code = int(raw_code)
-            except (TypeError, ValueError):
-                err_code = 0
-            if err_code not in (None, 0):
-                msg = status.get("error_message") or ""
-                raise RequestException(f"CMC error {err_code}: {msg}")
-            r.raise_for_status()
-            return payload.get("data", payload)
-        except RequestException as e:
-            last = e
-            raw = None
-            try:
-                raw = r.text[:500]
-            except Exception: pass
-            logger.warning("CMC GET %s failed: %s | raw=%s", path, e, raw)
-    raise last
-
-
 # --------- Global Metrics ---------
 
 def fetch_global_metrics() -> Dict:
@@ -95,51 +66,16 @@ def persist_global_metrics(payload: Dict) -> MarketSnapshot:
     )
 
 
-# --------- “CMC20” Top-20 Index (cap-weighted; yesterday=100) ---------
+# --------- Top list (shared listings snapshot) ---------
+# CMC20 itself is computed from the local coin table, see indices.
 
 def _fetch_top_list(n: int) -> List[dict]:
-    data = _cmc_get("/v1/cryptocurrency/listings/latest", {
-        "start": "1",
-        "limit": str(max(n, 40)),
-        "convert": "USD",
-        "sort": "market_cap",
-    })
-    coins = [c for c in data if c["symbol"] not in STABLE_TICKERS]
+    # Shared listings snapshot: the heavy boxes and the coin refresh read
+    # the same pull within a cycle
+    coins = [c for c in get_listings(max(n + len(STABLE_TICKERS), 40), "USD") if c["symbol"] not in STABLE_TICKERS]
     return coins[:n]
 
 
-def _cap_weight_levels(coins: List[dict]) -> Tuple[Decimal, Decimal]:
-    level_now, level_yday = Decimal(0), Decimal(0)
-    for c in coins:
-        q = c["quote"]["USD"]
-        mcap = Decimal(str(q.get("market_cap", 0)))
-        price_now = Decimal(str(q["price"]))
-        chg24 = Decimal(str(q.get("percent_change_24h", 0)))  # %
-        denom = (Decimal(1) + (chg24 / Decimal(100))) or Decimal(1)
-        price_yday = price_now / denom
-        level_now += mcap * price_now
-        level_yday += mcap * price_yday
-    return level_now, level_yday
-
-
-def compute_top20_index() -> Dict:
-    coins = _fetch_top_list(20)
-    now_val, yday_val = _cap_weight_levels(coins)
-    if yday_val == 0:
-        idx, pct = Decimal(100), Decimal(0)
-    else:
-        idx = (now_val / yday_val) * Decimal(100)
-        pct = ((idx - Decimal(100)) / Decimal(100)) * Decimal(100)
-    return {"index_value": idx.quantize(Decimal("0.01")), "pct_change_24h": pct.quantize(Decimal("0.01"))}
-
-
-def persist_top20_index(point: Dict) -> Top20IndexPoint:
-    return Top20IndexPoint.objects.create(
-        index_value=point["index_value"],
-        pct_change_24h=point["pct_change_24h"],
-    )
-
-
 # --------- Fear & Greed ---------
 
 def fetch_fear_greed_latest() -> Dict:
@@ -167,9 +103,7 @@ def persist_fear_greed(payload: Dict) -> FearGreedReading:
 
 # --------- Optional “heavy” metrics (Altseason & Avg RSI) ---------
 
-def _fetch_ohlc_daily(coin_id: int, days: int) -> List[dict]:
-    end = dt.datetime.utcnow().date()
-    start = end - dt.timedelta(days=days)
+def _fetch_ohlc_range(coin_id: int, start: dt.date, end: dt.date) -> List[dict]:
     data = _cmc_get("/v1/cryptocurrency/ohlcv/historical", {
         "id": str(coin_id),
         "convert": "USD",
@@ -180,63 +114,206 @@ def _fetch_ohlc_daily(coin_id: int, days: int) -> List[dict]:
     return data.get("quotes", [])
 
 
-def _pct_change_from_ohlc(rows: List[dict]) -> Decimal:
-    if not rows:
-        return Decimal(0)
-    p0 = Decimal(str(rows[0]["quote"]["USD"]["close"]))
-    pn = Decimal(str(rows[-1]["quote"]["USD"]["close"]))
-    return ((pn - p0) / p0) * Decimal(100) if p0 else Decimal(0)
-
-
-def _rsi_from_ohlc(rows: List[dict], period: int = 14) -> Decimal:
-    closes = [Decimal(str(r["quote"]["USD"]["close"])) for r in rows]
-    if len(closes) < period + 1:
-        return Decimal(50)
-    gains, losses = [], []
-    for i in range(1, len(closes)):
-        d = closes[i] - closes[i - 1]
-        gains.append(max(d, Decimal(0)))
-        losses.append(max(-d, Decimal(0)))
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
-    for i in range(period, len(gains)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-    if avg_loss == 0:
-        return Decimal(100)
-    rs = avg_gain / avg_loss
-    return Decimal(100) - (Decimal(100) / (Decimal(1) + rs))
-
-
-def compute_altseason_and_avg_rsi(
-    altseason_lookback_days: int = 90,
-    rsi_lookback_days: int = 100,
-    rsi_basket_size: int = 100,
-) -> Tuple[Dict, Dict]:
-    top = _fetch_top_list(max(rsi_basket_size, 60))
+def _store_daily_candles(coin_id: int, quotes: List[dict], before: dt.date) -> int:
+    candles = []
+    for q in quotes:
+        try:
+            day = dt.date.fromisoformat(str(q.get("time_open", ""))[:10])
+        except ValueError:
+            continue
+        if day >= before:
+            continue  # still open
+        usd = q["quote"]["USD"]
+        candles.append(DailyCandle(
+            coin_id=coin_id,
+            date=day,
+            open=Decimal(str(usd["open"])),
+            high=Decimal(str(usd["high"])),
+            low=Decimal(str(usd["low"])),
+            close=Decimal(str(usd["close"])),
+            volume=Decimal(str(usd.get("volume") or 0)),
+        ))
+    DailyCandle.objects.bulk_create(
+        candles,
+        update_conflicts=True,
+        unique_fields=["coin_id", "date"],
+        update_fields=["open", "high", "low", "close", "volume"],
+    )
+    return len(candles)
+
+
+def _ohlc_daily_many(coin_ids: List[int], days: int) -> Dict[int, List[dict]]:
+    """
+    Closed daily candles of the last ``days`` days per coin, served from
+    DailyCandle. Only days outside each coin's DailyCandleCoverage are
+    fetched, so overlapping windows share data and a daily run asks for
+    about one new candle per coin. Each fetch also re-reads the last
+    MARKETGLOBAL_OHLC_REFETCH_DAYS stored days so upstream corrections
+    overwrite them, and coverage only extends to the last candle actually
+    stored: a day CMC has not published yet is asked for again until it
+    is older than that window. Missing ranges are downloaded concurrently
+    under the shared CMC rate limit; all DB work stays on the calling
+    thread. Rows keep the CMC quote shape.
+    """
+    coin_ids = list(dict.fromkeys(coin_ids))
+    end = dt.datetime.utcnow().date()
+    start = end - dt.timedelta(days=days)
+    refetch = dt.timedelta(days=OHLC_REFETCH_DAYS)
+    coverage = {c.coin_id: c for c in DailyCandleCoverage.objects.filter(coin_id__in=coin_ids)}
+
+    missing = {}
+    for coin_id in coin_ids:
+        cov = coverage.get(coin_id)
+        if cov is None or start < cov.first_date:
+            fetch_from = start
+        else:
+            fetch_from = max(cov.last_date + dt.timedelta(days=1) - refetch, cov.first_date)
+        if cov is None or start < cov.first_date or cov.last_date + dt.timedelta(days=1) < end:
+            missing[coin_id] = fetch_from
+
+    # time_start is exclusive for daily periods
+    fetched = fetch_pages(
+        lambda coin_id: (coin_id, _fetch_ohlc_range(coin_id, missing[coin_id] - dt.timedelta(days=1), end)),
+        list(missing),
+        max_workers=CMC_CONCURRENCY,
+    )
+    for coin_id, (_, quotes) in fetched:
+        cov = coverage.get(coin_id)
+        with transaction.atomic():
+            _store_daily_candles(coin_id, quotes, before=end)
+            stored_last = DailyCandle.objects.filter(coin_id=coin_id, date__lt=end).aggregate(
+                last=Max("date")
+            )["last"]
+            # Days older than the refetch window without a candle count as covered
+            last_dates = [missing[coin_id] - dt.timedelta(days=1), end - refetch - dt.timedelta(days=1)]
+            last_dates += [d for d in (stored_last, cov and cov.last_date) if d]
+            DailyCandleCoverage.objects.update_or_create(
+                coin_id=coin_id,
+                defaults={
+                    "first_date": min(missing[coin_id], cov.first_date) if cov else missing[coin_id],
+                    "last_date": max(last_dates),
+                },
+            )
+
+    out: Dict[int, List[dict]] = {coin_id: [] for coin_id in coin_ids}
+    for c in DailyCandle.objects.filter(coin_id__in=coin_ids, date__gte=start, date__lt=end).order_by("coin_id", "date"):
+        out[c.coin_id].append({
+            "time_open": c.date.isoformat(),
+            "quote": {"USD": {"open": c.open, "high": c.high, "low": c.low, "close": c.close, "volume": c.volume}},
+        })
+    return out
+
+
+def _fetch_ohlc_daily(coin_id: int, days: int) -> List[dict]:
+    return _ohlc_daily_many([coin_id], days)[coin_id]
+
+
+def _closes(rows: List[dict]) -> List[Decimal]:
+    return [Decimal(str(r["quote"]["USD"]["close"])) for r in rows]
+
+
+def _state_matches(state: RsiState, closes: List[Decimal], pos: int) -> bool:
+    """Whether the closes the state remembers up to ``as_of`` (at ``pos``) are unchanged."""
+    remembered = [Decimal(c) for c in state.recent_closes] or [state.last_close]
+    remembered = remembered[-(pos + 1):]
+    return closes[pos + 1 - len(remembered):pos + 1] == remembered
+
+
+def _recent_closes(closes: List[Decimal]) -> List[str]:
+    # Every day a daily fetch may rewrite, plus as_of itself
+    return [str(c) for c in closes[-(OHLC_REFETCH_DAYS + 1):]]
+
+
+def _basket_rsi(coin_ids: List[int], rows_by_coin: Dict[int, List[dict]], period: int = 14) -> List[Decimal]:
+    """
+    RSI per coin from stored RsiState, advanced by the candles after its
+    ``as_of`` day. A coin is recomputed over its whole window only when it
+    has no state yet, its state fell out of the window, or any close of
+    the re-fetched days up to ``as_of`` no longer matches (history corrected).
+    """
+    states = {s.coin_id: s for s in RsiState.objects.filter(coin_id__in=coin_ids, period=period)}
+    now = timezone.now()
+    rsi: Dict[int, Decimal] = {}
+    to_update, to_seed = [], []
+
+    for coin_id in coin_ids:
+        rows = rows_by_coin.get(coin_id, [])
+        state = states.get(coin_id)
+        dates = [r["time_open"] for r in rows]
+        pos = dates.index(state.as_of.isoformat()) if state and state.as_of.isoformat() in dates else None
+        closes = _closes(rows)
+        if pos is None or not _state_matches(state, closes, pos):
+            to_seed.append((coin_id, rows, closes))
+            continue
+        if pos + 1 < len(closes):
+            state.avg_gain, state.avg_loss = indicators.advance_wilder(
+                state.avg_gain, state.avg_loss, closes[pos:], period
+            )
+            state.as_of = dt.date.fromisoformat(dates[-1])
+            state.last_close = closes[-1]
+            state.recent_closes = _recent_closes(closes)
+            state.updated_at = now
+            to_update.append(state)
+        rsi[coin_id] = indicators.rsi_from_averages(state.avg_gain, state.avg_loss)
+
+    seeded = []
+    for (coin_id, rows, closes), averages in zip(
+        to_seed, indicators.basket_wilder([closes for _, _, closes in to_seed], period)
+    ):
+        if averages is None:
+            rsi[coin_id] = Decimal(50)
+            continue
+        seeded.append(RsiState(
+            coin_id=coin_id,
+            period=period,
+            as_of=dt.date.fromisoformat(rows[-1]["time_open"]),
+            last_close=closes[-1],
+            recent_closes=_recent_closes(closes),
+            avg_gain=averages[0],
+            avg_loss=averages[1],
+            updated_at=now,
+        ))
+        rsi[coin_id] = indicators.rsi_from_averages(*averages)
+
+    with transaction.atomic():
+        RsiState.objects.bulk_update(to_update, ["as_of", "last_close", "recent_closes", "avg_gain", "avg_loss", "updated_at"])
+        RsiState.objects.bulk_create(
+            seeded,
+            update_conflicts=True,
+            unique_fields=["coin_id", "period"],
+            update_fields=["as_of", "last_close", "recent_closes", "avg_gain", "avg_loss", "updated_at"],
+        )
+    return [rsi[coin_id] for coin_id in coin_ids]
+
+
+def _alts_and_btc(top: List[dict]) -> Tuple[List[dict], dict]:
     alts = [c for c in top if c["symbol"] not in STABLE_TICKERS and c["symbol"] != "BTC"][:50]
     btc = next(c for c in top if c["symbol"] == "BTC")
+    return alts, btc
+
+
+def _rsi_universe(top: List[dict], basket_size: int) -> List[dict]:
+    return [c for c in top if c["symbol"] not in STABLE_TICKERS][:basket_size]
 
-    btc_rows = _fetch_ohlc_daily(btc["id"], altseason_lookback_days)
-    btc_pct = _pct_change_from_ohlc(btc_rows)
 
-    beaters = 0
-    for c in alts:
-        rows = _fetch_ohlc_daily(c["id"], altseason_lookback_days)
-        if _pct_change_from_ohlc(rows) > btc_pct:
-            beaters += 1
+def compute_altseason(lookback_days: int = 90) -> Dict:
+    alts, btc = _alts_and_btc(_fetch_top_list(60))
+    history = _ohlc_daily_many([btc["id"]] + [c["id"] for c in alts], lookback_days)
+
+    # Whole basket at once (see indicators)
+    returns = indicators.basket_pct_change([_closes(history[c["id"]]) for c in [btc] + alts])
+    btc_pct, alt_pcts = returns[0], returns[1:]
+    beaters = sum(1 for pct in alt_pcts if pct > btc_pct)
     share = (beaters / max(len(alts), 1)) * 100
-    altseason = {"percentage": Decimal(str(round(share, 2))), "is_altseason": share >= 75}
+    return {"percentage": Decimal(str(round(share, 2))), "is_altseason": share >= 75}
 
-    rsi_universe = [c for c in top if c["symbol"] not in STABLE_TICKERS][:rsi_basket_size]
-    rsis = []
-    for c in rsi_universe:
-        rows = _fetch_ohlc_daily(c["id"], rsi_lookback_days)
-        rsis.append(_rsi_from_ohlc(rows, 14))
-    avg_rsi = sum(rsis) / Decimal(len(rsis)) if rsis else Decimal(50)
-    avg_rsi_payload = {"avg_rsi": Decimal(str(round(avg_rsi, 2)))}
 
-    return altseason, avg_rsi_payload
+def compute_avg_rsi(lookback_days: int = 100, basket_size: int = 100) -> Dict:
+    universe = _rsi_universe(_fetch_top_list(max(basket_size, 60)), basket_size)
+    history = _ohlc_daily_many([c["id"] for c in universe], lookback_days)
+    rsis = _basket_rsi([c["id"] for c in universe], history, 14)
+    avg_rsi = sum(rsis) / Decimal(len(rsis)) if rsis else Decimal(50)
+    return {"avg_rsi": Decimal(str(round(avg_rsi, 2)))}
 
 
 def persist_altseason(payload: Dict) -> AltseasonReading:
@@ -248,29 +325,3 @@ def persist_altseason(payload: Dict) -> AltseasonReading:
 
 def persist_avg_rsi(payload: Dict) -> AverageRsiReading:
     return AverageRsiReading.objects.create(avg_rsi=payload["avg_rsi"])
-
-
-# --------- Orchestrator ---------
-
-@transaction.atomic
-def update_dashboard(compute_heavy: bool = False) -> Dict:
-    out: Dict[str, object] = {}
-
-    gm = fetch_global_metrics()
-    out["market_snapshot"] = persist_global_metrics(gm)
-
-    idx = compute_top20_index()
-    out["top20_point"] = persist_top20_index(idx)
-
-    try:
-        fg = fetch_fear_greed_latest()
-        out["fear_greed"] = persist_fear_greed(fg)
-    except Exception as e:
-        out["fear_greed_error"] = str(e)
-
-    if compute_heavy:
-        altseason, avg_rsi = compute_altseason_and_avg_rsi()
-        out["altseason"] = persist_altseason(altseason)
-        out["average_rsi"] = persist_avg_rsi(avg_rsi)
-
-    return out
@@ -1,3 +1,326 @@
+import datetime as dt
+import random
+import signal
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from crypto.models import Category
+from crypto.sync import refresh_top_coins
+from marketglobal import collectors, indicators, indices, services
+from marketglobal.models import DailyCandle, RsiState, Top20IndexPoint
+
+
+def make_quotes(start, end, close=1.0):
+    quotes = []
+    day = start
+    while day <= end:
+        usd = {"open": close, "high": close, "low": close, "close": close, "volume": 10}
+        quotes.append({"time_open": f"{day.isoformat()}T00:00:00.000Z", "quote": {"USD": usd}})
+        day += dt.timedelta(days=1)
+    return quotes
+
+
+class DailyCandleCacheTests(TestCase):
+    def fake_range(self, coin_id, start, end):
+        self.calls.append((coin_id, start, end))
+        # CMC returns periods after time_start, including the still-open one for today
+        return make_quotes(start + dt.timedelta(days=1), end)
+
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.object(services, "_fetch_ohlc_range", side_effect=self.fake_range)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_overlapping_windows_share_cached_days(self):
+        rows = services._fetch_ohlc_daily(1, 5)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(rows[-1]["quote"]["USD"]["close"], Decimal("1"))
+
+        services._fetch_ohlc_daily(1, 5)
+        self.assertEqual(len(self.calls), 1)
+
+        rows = services._fetch_ohlc_daily(1, 10)
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(DailyCandle.objects.filter(coin_id=1).count(), 10)
+
+    def test_only_missing_tail_is_fetched(self):
+        services._fetch_ohlc_daily(2, 5)
+        coverage = services.DailyCandleCoverage.objects.get(coin_id=2)
+        coverage.last_date -= dt.timedelta(days=2)
+        coverage.save()
+        services._fetch_ohlc_daily(2, 5)
+        today = dt.datetime.utcnow().date()
+        # The gap plus the trailing refetch window (time_start is exclusive)
+        self.assertEqual(self.calls[-1][1], today - dt.timedelta(days=3 + services.OHLC_REFETCH_DAYS))
+
+    def test_unpublished_day_is_asked_again(self):
+        today = dt.datetime.utcnow().date()
+        with mock.patch.object(
+            services, "_fetch_ohlc_range",
+            side_effect=lambda coin_id, start, end: make_quotes(start + dt.timedelta(days=1), today - dt.timedelta(days=2)),
+        ):
+            services._fetch_ohlc_daily(4, 5)
+        coverage = services.DailyCandleCoverage.objects.get(coin_id=4)
+        self.assertEqual(coverage.last_date, today - dt.timedelta(days=2))
+
+        # Published now: fetched on the next run and corrections overwrite the tail
+        DailyCandle.objects.filter(coin_id=4, date=today - dt.timedelta(days=2)).update(close=5)
+        rows = services._fetch_ohlc_daily(4, 5)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-2]["quote"]["USD"]["close"], Decimal("1"))
+        coverage.refresh_from_db()
+        self.assertEqual(coverage.last_date, today - dt.timedelta(days=1))
+        calls = len(self.calls)
+        services._fetch_ohlc_daily(4, 5)
+        self.assertEqual(len(self.calls), calls)
+
+    def test_many_coins_fetched_concurrently_in_one_pass(self):
+        history = services._ohlc_daily_many([1, 2, 3, 2], 5)
+        self.assertEqual(sorted(history), [1, 2, 3])
+        self.assertEqual(sorted(c[0] for c in self.calls), [1, 2, 3])
+        self.assertTrue(all(len(rows) == 5 for rows in history.values()))
+
+
+class IndicatorTests(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.series = []
+        for length in [100] * 30 + [40, 15, 3, 0]:
+            price, closes = Decimal("100"), []
+            for _ in range(length):
+                price = max(price * Decimal(str(1 + rng.uniform(-0.08, 0.08))), Decimal("0.0001"))
+                closes.append(price.quantize(Decimal("0.00000001")))
+            self.series.append(closes)
+        self.series.append([Decimal("5")] * 20)  # no losses -> RSI 100
+
+    def basket_rsi(self):
+        return [
+            indicators.rsi_from_averages(*averages) if averages else Decimal(50)
+            for averages in indicators.basket_wilder(self.series)
+        ]
+
+    @skipUnless(indicators.np is not None, "numpy not installed")
+    def test_vectorized_matches_decimal(self):
+        for fast, slow in zip(self.basket_rsi(), [indicators.rsi_decimal(c) for c in self.series]):
+            self.assertAlmostEqual(float(fast), float(slow), places=6)
+        for fast, slow in zip(indicators.basket_pct_change(self.series), [indicators.pct_change_decimal(c) for c in self.series]):
+            self.assertAlmostEqual(float(fast), float(slow), places=6)
+
+    def test_decimal_fallback_without_numpy(self):
+        with mock.patch.object(indicators, "np", None):
+            rsis = self.basket_rsi()
+        self.assertEqual(rsis[-1], Decimal(100))
+        self.assertEqual(rsis[-3], Decimal(50))  # too short
+
+
+class RsiStateTests(TestCase):
+    def rows(self, closes, first_day):
+        return [
+            {"time_open": (first_day + dt.timedelta(days=i)).isoformat(), "quote": {"USD": {"close": c}}}
+            for i, c in enumerate(closes)
+        ]
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.closes = [Decimal(str(round(100 + rng.uniform(-10, 10), 4))) for _ in range(60)]
+        self.day0 = dt.date(2025, 1, 1)
+
+    def test_state_is_seeded_then_advanced(self):
+        first = services._basket_rsi([1], {1: self.rows(self.closes[:50], self.day0)})
+        state = RsiState.objects.get(coin_id=1)
+        self.assertEqual(state.as_of, self.day0 + dt.timedelta(days=49))
+        self.assertAlmostEqual(float(first[0]), float(indicators.rsi_decimal(self.closes[:50])), places=6)
+
+        # Next day: window slides by one; only the new candle is folded in
+        with mock.patch.object(indicators, "basket_wilder", wraps=indicators.basket_wilder) as full:
+            advanced = services._basket_rsi([1], {1: self.rows(self.closes[1:51], self.day0 + dt.timedelta(days=1))})
+        self.assertEqual(full.call_args[0][0], [])
+        state.refresh_from_db()
+        self.assertEqual(state.as_of, self.day0 + dt.timedelta(days=50))
+        self.assertAlmostEqual(float(advanced[0]), float(indicators.rsi_decimal(self.closes[:51])), places=6)
+
+    def test_corrected_history_is_recomputed(self):
+        services._basket_rsi([1], {1: self.rows(self.closes[:50], self.day0)})
+        corrected = self.closes[:49] + [self.closes[49] + 5]
+        result = services._basket_rsi([1], {1: self.rows(corrected, self.day0)})
+        self.assertAlmostEqual(float(result[0]), float(indicators.rsi_decimal(corrected)), places=6)
+        self.assertEqual(RsiState.objects.get(coin_id=1).last_close, corrected[-1])
+
+
+    def test_correction_before_as_of_is_recomputed(self):
+        services._basket_rsi([1], {1: self.rows(self.closes[:50], self.day0)})
+        # The day before as_of is inside the re-fetched window
+        corrected = self.closes[:48] + [self.closes[48] + 5, self.closes[49]]
+        result = services._basket_rsi([1], {1: self.rows(corrected, self.day0)})
+        self.assertAlmostEqual(float(result[0]), float(indicators.rsi_decimal(corrected)), places=6)
+        state = RsiState.objects.get(coin_id=1)
+        self.assertEqual([Decimal(c) for c in state.recent_closes], corrected[-(services.OHLC_REFETCH_DAYS + 1):])
+
+class CollectorTests(TestCase):
+    def test_failing_box_does_not_block_others(self):
+        def boom():
+            raise ValueError("upstream down")
+
+        results = collectors.run_once([
+            collectors.Collector("ok", lambda: 1, lambda payload: payload + 1, interval=60),
+            collectors.Collector("bad", boom, lambda payload: payload, interval=60),
+        ])
+        self.assertEqual(results["ok"], 2)
+        self.assertIsInstance(results["bad"], ValueError)
+
+    def test_lock_group_runs_one_at_a_time(self):
+        active, overlaps = [], []
+
+        def fetch():
+            active.append(1)
+            if len(active) > 1:
+                overlaps.append(1)
+            time.sleep(0.05)
+            active.pop()
+
+        results = collectors.run_once([
+            collectors.Collector(f"heavy{i}", fetch, lambda payload: "done", interval=60, lock="heavy")
+            for i in range(3)
+        ])
+        self.assertEqual(set(results.values()), {"done"})
+        self.assertEqual(overlaps, [])
+
+    def test_scheduler_respects_interval_and_overlap(self):
+        release = threading.Event()
+        slow = collectors.Collector("slow", release.wait, lambda payload: payload, interval=10)
+        fast = collectors.Collector("fast", lambda: 1, lambda payload: payload, interval=10)
+        scheduler = collectors.Scheduler([slow, fast])
+        self.addCleanup(scheduler.shutdown)
+        self.addCleanup(release.set)
+        self.assertEqual(scheduler.run_pending(now=100), [slow, fast])
+        self.assertEqual(scheduler.running["fast"].result(timeout=1), 1)
+        self.assertEqual(scheduler.run_pending(now=105), [])
+        # Due again, but the slow run is still going
+        self.assertEqual(scheduler.run_pending(now=111), [fast])
+        release.set()
+        scheduler.running["slow"].result(timeout=1)
+        self.assertEqual(scheduler.run_pending(now=112), [slow])
+
+    def test_update_dashboard_reports_errors_per_box(self):
+        fakes = {
+            name: collectors.Collector(name, lambda: None, lambda payload, name=name: name, interval=60)
+            for name in collectors.LIGHT
+        }
+        fakes["fear_greed"].fetch = mock.Mock(side_effect=ValueError("bad payload"))
+        with mock.patch.dict(collectors.COLLECTORS, fakes):
+            out = collectors.update_dashboard()
+        self.assertEqual(sorted(out), ["fear_greed_error", "market_snapshot"])
+
+    def test_jitter_spreads_next_run(self):
+        box = collectors.Collector("box", lambda: 1, None, interval=100)
+        scheduler = collectors.Scheduler([box], jitter=0.1)
+        self.addCleanup(scheduler.shutdown)
+        scheduler.run_pending(now=0)
+        self.assertTrue(90 <= scheduler.next_run["box"] <= 110)
+
+    def test_group_locked_elsewhere_is_skipped(self):
+        calls = []
+        box = collectors.Collector("box", lambda: calls.append(1), None, interval=60)
+        cache.add("marketglobal:collector:lock:box", 1, 60)
+        self.addCleanup(cache.delete, "marketglobal:collector:lock:box")
+        self.assertIs(collectors._run_exclusive(box), collectors.SKIPPED)
+        self.assertEqual(calls, [])
+
+    def test_update_dashboard_respects_locks(self):
+        fakes = {
+            name: collectors.Collector(name, lambda: None, lambda payload, name=name: name, interval=60)
+            for name in collectors.LIGHT
+        }
+        cache.add("marketglobal:collector:lock:fear_greed", 1, 60)
+        self.addCleanup(cache.delete, "marketglobal:collector:lock:fear_greed")
+        with mock.patch.dict(collectors.COLLECTORS, fakes):
+            out = collectors.update_dashboard()
+        self.assertTrue(out["fear_greed_skipped"])
+        self.assertNotIn("fear_greed", out)
+
+    def test_run_collectors_stops_on_signal(self):
+        ran = threading.Event()
+        box = collectors.Collector("box", ran.set, None, interval=60)
+
+        def run_forever(scheduler, stop, tick):
+            scheduler.run_pending()
+            ran.wait(1)
+            signal.raise_signal(signal.SIGTERM)
+            self.assertTrue(stop.is_set())
+
+        with mock.patch.object(collectors.Scheduler, "run_forever", run_forever), \
+                mock.patch("marketglobal.management.commands.run_collectors.get_collectors", return_value=[box]):
+            out = StringIO()
+            previous = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+            try:
+                call_command("run_collectors", "--no-crypto", stdout=out, stderr=StringIO())
+            finally:
+                signal.signal(signal.SIGTERM, previous[0])
+                signal.signal(signal.SIGINT, previous[1])
+        self.assertTrue(ran.is_set())
+        self.assertIn("Collectors stopped", out.getvalue())
+
+    def test_run_collectors_uses_configured_provider(self):
+        captured = {}
+
+        def run_forever(scheduler, stop, tick):
+            captured.update((c.name, c) for c in scheduler.collectors)
+
+        with mock.patch.object(collectors.Scheduler, "run_forever", run_forever), \
+                mock.patch("marketglobal.management.commands.run_collectors.signal.signal"), \
+                self.settings(CRYPTO_PROVIDER="cmc"):
+            call_command("run_collectors", "--only", "crypto_top_coins", stdout=StringIO(), stderr=StringIO())
+        from crypto import services_cmc
+        self.assertIs(captured["crypto_top_coins"].fetch, services_cmc.update_top_coins)
+
+
+class LocalIndexTests(TestCase):
+    def setUp(self):
+        top = Category.objects.create(name="Top")
+        self.rows = [
+            self.row("bitcoin", "BTC", 1, "900", 0, top),
+            self.row("tether", "USDT", 2, "500", 100, top),
+            self.row("ethereum", "ETH", 3, "110", 10, top),
+            self.row("uniswap", "UNI", 4, "50", -50, top),
+        ]
+
+    def row(self, coin_id, symbol, rank, market_cap, change_24h, category):
+        return {
+            "coingecko_id": coin_id, "rank": rank, "name": coin_id.title(), "symbol": symbol,
+            "price": 1, "percent_change_1h": 0, "percent_change_24h": change_24h, "percent_change_7d": 0,
+            "market_cap": market_cap, "volume_24h": "0", "circulating_supply": "0", "category": category,
+        }
+
+    def refresh(self):
+        return refresh_top_coins("test", lambda start_page: iter([(1, self.rows)]), lambda row: row, limit=10)
+
+    def test_index_from_stored_coins_excludes_stables(self):
+        self.refresh()
+        # (900 + 110) now against (900 + 100) yesterday; USDT left out
+        self.assertEqual(
+            indices.compute_index(size=2),
+            {"index_value": Decimal("101.00"), "pct_change_24h": Decimal("1.00")},
+        )
+
+    def test_refresh_records_a_point_per_index(self):
+        with mock.patch.dict(indices.INDICES, {"cmc20": {"size": 20}, "top2": {"size": 2}}, clear=True):
+            self.refresh()
+        points = {p.index_key: p.index_value for p in Top20IndexPoint.objects.all()}
+        self.assertEqual(points, {"cmc20": Decimal("96.3600"), "top2": Decimal("101.0000")})
+
+    def test_dashboard_boxes_do_not_write_index_points(self):
+        self.refresh()
+        self.assertNotIn("top20_point", collectors.COLLECTORS)
+        with mock.patch.object(services, "_cmc_get", side_effect=ValueError("offline")):
+            collectors.update_dashboard()
+        self.assertEqual(Top20IndexPoint.objects.count(), 1)
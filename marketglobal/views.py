@@ -12,7 +12,7 @@ from .serializers import (
     MarketSnapshotSerializer, Top20IndexPointSerializer, FearGreedSerializer,
     AltseasonSerializer, AverageRsiSerializer
 )
-from .services import update_dashboard
+from .collectors import update_dashboard
 
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
@@ -49,7 +49,10 @@ class MarketCapView(APIView):
 
 @extend_schema(
     tags=["Boxes"], summary="CMC20 (Top-20 index)",
-    parameters=[OpenApiParameter(name="limit", description="Sparkline points (latest first)", required=False, type=int)]
+    parameters=[
+        OpenApiParameter(name="limit", description="Sparkline points (latest first)", required=False, type=int),
+        OpenApiParameter(name="index", description="Index key (MARKETGLOBAL_INDICES), default cmc20", required=False, type=str),
+    ]
 )
 @method_decorator(cache_page(CACHE_1M), name="get")
 class CMC20View(APIView):
@@ -57,8 +60,9 @@ class CMC20View(APIView):
 
     def get(self, request):
         limit = int(request.query_params.get("limit", 120))
-        latest = Top20IndexPoint.objects.first()
-        points = Top20IndexPoint.objects.all()[:limit]
+        points = Top20IndexPoint.objects.filter(index_key=request.query_params.get("index", "cmc20"))
+        latest = points.first()
+        points = points[:limit]
         return Response({
             "latest": Top20IndexPointSerializer(latest).data if latest else None,
             "sparkline": Top20IndexPointSerializer(points, many=True).data,
@@ -109,7 +113,7 @@ class DashboardAggregateView(APIView):
     def get(self, request):
         res = {}
         ms  = MarketSnapshot.objects.first()
-        t20 = Top20IndexPoint.objects.first()
+        t20 = Top20IndexPoint.objects.filter(index_key="cmc20").first()
         fg  = FearGreedReading.objects.first()
         alt = AltseasonReading.objects.first()
         rsi = AverageRsiReading.objects.first()
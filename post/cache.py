@@ -0,0 +1,22 @@
+import time
+
+from django.core.cache import cache
+
+RELATED_POSTS_VERSION_KEY = "post:related:version"
+
+
+def related_posts_version() -> int:
+    """Version of all cached related-posts pages; bumped on every post change."""
+    version = cache.get(RELATED_POSTS_VERSION_KEY)
+    if version is None:
+        version = int(time.time())
+        cache.add(RELATED_POSTS_VERSION_KEY, version, None)
+        version = cache.get(RELATED_POSTS_VERSION_KEY, version)
+    return version
+
+
+def invalidate_related_posts() -> None:
+    try:
+        cache.incr(RELATED_POSTS_VERSION_KEY)
+    except ValueError:
+        cache.set(RELATED_POSTS_VERSION_KEY, int(time.time()), None)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0002_post_coins'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-publish_at'], name='post_status_publish_idx'),
+        ),
+    ]
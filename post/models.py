@@ -1,12 +1,28 @@
 from django.db import models
 from crypto.models import CryptoCoin
 
+from .cache import invalidate_related_posts
+
 
 class Status(models.TextChoices):
     DRAFT = "Draft"
     PUBLISHED = "Published"
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(status=Status.PUBLISHED)
+
+    def related_to(self, coin_id):
+        """Published posts of one coin, newest first, with their coins prefetched."""
+        return (
+            self.published()
+            .filter(coins=coin_id)
+            .prefetch_related("coins")
+            .order_by("-publish_at", "-id")
+        )
+
+
 class Post(models.Model):
     title = models.CharField(
         max_length=256,
@@ -53,5 +69,21 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-publish_at"], name="post_status_publish_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_related_posts()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_related_posts()
+        return result
@@ -0,0 +1,16 @@
+"""
+Related-posts cache invalidation for coin links. A receiver rather than
+view/admin overrides, so ``post.coins.add/set/remove/clear()`` from
+anywhere drops the cached pages.
+"""
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .cache import invalidate_related_posts
+from .models import Post
+
+
+@receiver(m2m_changed, sender=Post.coins.through, dispatch_uid="post.post_coins_changed")
+def post_coins_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_related_posts()
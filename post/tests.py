@@ -4,12 +4,14 @@ import tempfile
 from io import BytesIO
 from PIL import Image
 
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from crypto.models import CryptoCoin
 from post.models import Post, Status
 
 
@@ -77,3 +79,43 @@ class PostAPITestCase(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Post.objects.filter(id=post.id).exists())
+
+    def test_coin_posts_published_paginated_and_cached(self):
+        cache.clear()
+        coin = CryptoCoin.objects.create(
+            coingecko_id="bitcoin", name="Bitcoin", symbol="btc", rank=1, price=1,
+            percent_change_1h=0, percent_change_24h=0, percent_change_7d=0,
+            market_cap="0", volume_24h="0", circulating_supply="0",
+        )
+        for i in range(12):
+            post = Post.objects.create(**{**self.post_data, "title": f"Post {i}", "post_image": generate_test_image()})
+            post.coins.add(coin)
+        draft = Post.objects.create(**{**self.post_data, "status": Status.DRAFT, "post_image": generate_test_image()})
+        draft.coins.add(coin)
+
+        url = f"/api/posts/coin/{coin.id}/"
+        with self.assertNumQueries(4):  # coin check, count, page, prefetch of coins
+            response = self.client.get(url)
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 10)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        Post.objects.filter(status=Status.PUBLISHED).first().delete()
+        self.assertEqual(self.client.get(url).data["count"], 11)
+        self.assertEqual(len(self.client.get(f"/api/coins/{coin.id}/related_posts/", {"page": 2}).data["results"]), 1)
+
+    def test_coin_links_changed_anywhere_refresh_related_posts(self):
+        cache.clear()
+        coin = CryptoCoin.objects.create(
+            coingecko_id="bitcoin", name="Bitcoin", symbol="btc", rank=1, price=1,
+            percent_change_1h=0, percent_change_24h=0, percent_change_7d=0,
+            market_cap="0", volume_24h="0", circulating_supply="0",
+        )
+        post = Post.objects.create(**{**self.post_data, "post_image": generate_test_image()})
+        url = f"/api/posts/coin/{coin.id}/"
+        self.assertEqual(self.client.get(url).data["count"], 0)
+        post.coins.add(coin)
+        self.assertEqual(self.client.get(url).data["count"], 1)
+        post.coins.clear()
+        self.assertEqual(self.client.get(url).data["count"], 0)
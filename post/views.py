@@ -1,11 +1,42 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import viewsets, permissions, decorators, response, status
+from rest_framework.pagination import PageNumberPagination
+from .cache import related_posts_version
 from .models import Post
 from .serializers import PostSerializer
 from crypto.models import CryptoCoin
 
+RELATED_POSTS_CACHE_TTL = getattr(settings, "POST_RELATED_CACHE_TTL", 5 * 60)
+
+
+class RelatedPostsPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+
+def related_posts_response(request, coin_id):
+    """
+    One page of a coin's published posts, cached per coin and query string
+    until the next post change.
+    """
+    uri = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()[:16]
+    key = f"post:related:{related_posts_version()}:{coin_id}:{uri}"
+    data = cache.get(key)
+    if data is None:
+        paginator = RelatedPostsPagination()
+        page = paginator.paginate_queryset(Post.objects.related_to(coin_id), request)
+        serializer = PostSerializer(page, many=True, context={"request": request})
+        data = paginator.get_paginated_response(serializer.data).data
+        cache.set(key, data, RELATED_POSTS_CACHE_TTL)
+    return response.Response(data)
+
 
 class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by("-publish_at")
+    queryset = Post.objects.all().prefetch_related("coins").order_by("-publish_at")
     serializer_class = PostSerializer
 
     def get_permissions(self):
@@ -20,17 +51,12 @@ class PostViewSet(viewsets.ModelViewSet):
     )
     def coin_posts(self, request, coin_id=None):
         """
-        Returns all posts related to a given coin.
-        Example: GET /posts/coin/42/
+        Returns published posts related to a given coin, paginated.
+        Example: GET /posts/coin/42/?page=2
         """
-        try:
-            coin = CryptoCoin.objects.get(pk=coin_id)
-        except CryptoCoin.DoesNotExist:
+        if not CryptoCoin.objects.filter(pk=coin_id).exists():
             return response.Response(
                 {"detail": "Coin not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        posts = Post.objects.filter(coins=coin).order_by("-publish_at")
-        serializer = self.get_serializer(posts, many=True)
-        return response.Response(serializer.data)
+        return related_posts_response(request, coin_id)